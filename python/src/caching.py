@@ -0,0 +1,153 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import collections
+import threading
+import time
+
+# Returned by TtlLruCache.get when a key is not cached, because None can be a cached value
+MISSING = object()
+
+
+class TtlLruCache(object):
+    """ A thread-safe cache whose entries expire after a time to live, and that evicts the least recently used entry
+    when it is full.
+    """
+
+    def __init__(self, max_size=1000, ttl=300):
+        """ Creates an empty cache.
+
+        :param max_size: The maximum number of entries to keep.
+        :param ttl: The number of seconds after which an entry expires. None means that entries do not expire.
+        """
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """ Obtains a cached value.
+
+        :param key: The key of the value.
+        :return: The value, or MISSING if the key is not cached or has expired.
+        """
+
+        return self._get(key, count_miss=True)
+
+    def put(self, key, value, ttl=None):
+        """ Adds a value to the cache, evicting the least recently used entry if the cache is full.
+
+        :param key: The key of the value.
+        :param value: The value to cache.
+        :param ttl: The number of seconds after which this entry expires. Defaults to the ttl of the cache.
+        """
+
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key, load, ttl=None):
+        """ Obtains a cached value, calling a function to obtain and cache the value if it is not cached.
+
+        Threads that request the same key at the same time wait for a single call of the function.
+
+        :param key: The key of the value.
+        :param load: A function without arguments that returns the value.
+        :param ttl: The number of seconds after which a loaded entry expires. Defaults to the ttl of the cache.
+        :return: The value.
+        """
+
+        # Only the call that runs the function counts as a miss
+        value = self._get(key, count_miss=False)
+        if value is not MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread might have loaded the value while this thread was waiting
+            value = self._get(key, count_miss=False)
+            if value is not MISSING:
+                return value
+
+            with self._lock:
+                self.misses += 1
+            try:
+                value = load()
+                self.put(key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def invalidate(self, key=None, match=None):
+        """ Removes entries from the cache.
+
+        :param key: The key of the entry to remove.
+        :param match: A function that receives a key and returns True if the entry should be removed.
+        If neither key nor match is provided, all entries are removed.
+        """
+
+        with self._lock:
+            if key is not None:
+                self._entries.pop(key, None)
+            elif match is not None:
+                for cached_key in [cached_key for cached_key in self._entries if match(cached_key)]:
+                    del self._entries[cached_key]
+            else:
+                self._entries.clear()
+
+    def stats(self):
+        """ Obtains the hit and miss counts of the cache.
+
+        :return: A dictionary with the number of hits, misses, and entries, and the hit ratio.
+        """
+
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_ratio": float(self.hits) / requests if requests else 0.0,
+            }
+
+    def _get(self, key, count_miss):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if count_miss:
+                self.misses += 1
+            return MISSING
@@ -0,0 +1,93 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+
+# The original ApiClient.request method and the installed layers, for each ApiClient class
+_originals = {}
+_layers = {}
+_lock = threading.Lock()
+
+
+def install(api, name, layer, position):
+    """ Wraps every HTTP request that the API clients make with a layer, such as a rate limiter.
+
+    The layer applies to all ApiClient objects, including ones that already exist. Layers with a lower position run
+    closer to the HTTP request, so a layer at a higher position sees each call once even if a lower layer repeats it.
+
+    :param api: The Deep Security API modules.
+    :param name: The name of the layer. Installing a layer with the same name replaces it.
+    :param layer: A function that receives a call_next function and the arguments of ApiClient.request (method, url
+    and keyword arguments such as body and _preload_content), and returns the result of call_next or raises.
+    :param position: The position of the layer.
+    """
+
+    api_client_class = api.ApiClient
+    with _lock:
+        if api_client_class not in _originals:
+            _originals[api_client_class] = api_client_class.request
+            _layers[api_client_class] = {}
+        _layers[api_client_class][name] = (position, layer)
+        _rebuild(api_client_class)
+
+
+def uninstall(api, name):
+    """ Removes a layer that was installed with install.
+
+    :param api: The Deep Security API modules.
+    :param name: The name of the layer.
+    :return: True if the layer was installed.
+    """
+
+    api_client_class = api.ApiClient
+    with _lock:
+        if name not in _layers.get(api_client_class, {}):
+            return False
+        del _layers[api_client_class][name]
+        _rebuild(api_client_class)
+        if not _layers[api_client_class]:
+            del _layers[api_client_class]
+            del _originals[api_client_class]
+        return True
+
+
+def installed(api):
+    """ Lists the installed layers.
+
+    :param api: The Deep Security API modules.
+    :return: The names of the layers, from the outermost to the innermost.
+    """
+
+    with _lock:
+        layers = _layers.get(api.ApiClient, {})
+        return [name for name, (position, layer) in sorted(layers.items(), key=lambda item: -item[1][0])]
+
+
+def _rebuild(api_client_class):
+    # Wrap the original request method with each layer, from the innermost layer to the outermost
+    request = _originals[api_client_class]
+    for position, layer in sorted(_layers[api_client_class].values(), key=lambda item: item[0]):
+        request = _wrap(request, layer)
+    api_client_class.request = request
+
+
+def _wrap(request, layer):
+    def wrapped_request(self, method, url, *args, **kwargs):
+        def call_next(method, url, *args, **kwargs):
+            return request(self, method, url, *args, **kwargs)
+
+        return layer(call_next, method, url, *args, **kwargs)
+
+    return wrapped_request
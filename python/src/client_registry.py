@@ -0,0 +1,180 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+
+# The registry that get_api uses, for each API module
+_default_registries = {}
+_default_registries_lock = threading.Lock()
+
+
+class ClientRegistry(object):
+    """ Hands out shared API objects, such as a PoliciesApi, whose connections to Deep Security Manager are kept alive
+    and reused.
+
+    Each ApiClient normally opens its own pool of connections, so creating API objects in a loop makes a new TLS
+    handshake for almost every call. The registry creates one ApiClient for each Configuration object and one pool of
+    connections for each Deep Security Manager host, and the API objects that it returns are shared by all threads.
+
+    Shared ApiClient objects should not be used to read last_response, which belongs to whichever thread called last.
+    """
+
+    def __init__(self, api, connection_pool_maxsize=None, pools_size=4):
+        """ Creates a registry.
+
+        :param api: The Deep Security API modules.
+        :param connection_pool_maxsize: The maximum number of connections to keep open to each host. Set it to at least
+        the number of threads that make API calls at the same time. Defaults to the connection_pool_maxsize of the
+        first configuration of the host.
+        :param pools_size: The number of hosts whose connections are kept by each pool manager.
+        """
+
+        self.api = api
+        self.connection_pool_maxsize = connection_pool_maxsize
+        self.pools_size = pools_size
+        self._rest_clients = {}
+        self._api_clients = {}
+        self._apis = {}
+        self._lock = threading.Lock()
+
+    def get_api(self, api_class, configuration):
+        """ Obtains a shared API object.
+
+        :param api_class: The class of the API object, such as api.PoliciesApi.
+        :param configuration: The Configuration object that the API object uses.
+        :return: The API object. The same object is returned for the same class and configuration.
+        """
+
+        key = (api_class, id(configuration))
+        with self._lock:
+            api_object = self._apis.get(key)
+            if api_object is None:
+                api_object = api_class(self._get_api_client(configuration))
+                self._apis[key] = api_object
+            return api_object
+
+    def get_api_client(self, configuration):
+        """ Obtains the shared ApiClient of a configuration.
+
+        :param configuration: The Configuration object.
+        :return: An ApiClient object that uses the connection pool of the host of the configuration.
+        """
+
+        with self._lock:
+            return self._get_api_client(configuration)
+
+    def stats(self):
+        """ Reports how often connections were reused, for each host.
+
+        :return: A dictionary, keyed by host, of dictionaries with the connections key (connections that were opened)
+        and the requests key (requests that were sent). When requests is much larger than connections, connections
+        are being reused instead of making new handshakes.
+        """
+
+        with self._lock:
+            rest_clients = list(self._rest_clients.values())
+
+        stats = {}
+        for rest_client in rest_clients:
+            pools = rest_client.pool_manager.pools
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                host_stats = stats.setdefault(pool.host, {"connections": 0, "requests": 0})
+                host_stats["connections"] += pool.num_connections
+                host_stats["requests"] += pool.num_requests
+        return stats
+
+    def clear(self):
+        """ Closes the connections and forgets the shared objects.
+        """
+
+        with self._lock:
+            rest_clients = list(self._rest_clients.values())
+            self._rest_clients.clear()
+            self._api_clients.clear()
+            self._apis.clear()
+
+        for rest_client in rest_clients:
+            rest_client.pool_manager.clear()
+
+    def _get_api_client(self, configuration):
+        # The configuration is stored with its client so that its ID is not reused while the client exists
+        entry = self._api_clients.get(id(configuration))
+        if entry is None:
+            api_client = self.api.ApiClient(configuration)
+            api_client.rest_client = self._get_rest_client(configuration)
+            entry = (configuration, api_client)
+            self._api_clients[id(configuration)] = entry
+        return entry[1]
+
+    def _get_rest_client(self, configuration):
+        # Configurations of the same host share a pool unless they use different TLS settings
+        key = (configuration.host, configuration.verify_ssl, configuration.ssl_ca_cert, configuration.cert_file,
+               configuration.key_file, configuration.proxy)
+        rest_client = self._rest_clients.get(key)
+        if rest_client is None:
+            maxsize = self.connection_pool_maxsize
+            if maxsize is None:
+                maxsize = configuration.connection_pool_maxsize
+            rest_client = self.api.rest.RESTClientObject(configuration, pools_size=self.pools_size, maxsize=maxsize)
+            self._rest_clients[key] = rest_client
+        return rest_client
+
+
+def configure(api, connection_pool_maxsize=None, pools_size=4):
+    """ Replaces the registry that get_api uses, for example to change the size of the connection pools.
+
+    :param api: The Deep Security API modules.
+    :param connection_pool_maxsize: The maximum number of connections to keep open to each host.
+    :param pools_size: The number of hosts whose connections are kept by each pool manager.
+    :return: The new ClientRegistry object.
+    """
+
+    registry = ClientRegistry(api, connection_pool_maxsize, pools_size)
+    with _default_registries_lock:
+        previous = _default_registries.get(api)
+        _default_registries[api] = registry
+    if previous is not None:
+        previous.clear()
+    return registry
+
+
+def get_registry(api):
+    """ Obtains the registry that get_api uses, creating it with the default settings if needed.
+
+    :param api: The Deep Security API modules.
+    :return: A ClientRegistry object.
+    """
+
+    with _default_registries_lock:
+        registry = _default_registries.get(api)
+        if registry is None:
+            registry = ClientRegistry(api)
+            _default_registries[api] = registry
+        return registry
+
+
+def get_api(api, api_class, configuration):
+    """ Obtains a shared API object from the default registry.
+
+    :param api: The Deep Security API modules.
+    :param api_class: The class of the API object, such as api.PoliciesApi.
+    :param configuration: The Configuration object that the API object uses.
+    :return: The API object.
+    """
+
+    return get_registry(api).get_api(api_class, configuration)
@@ -0,0 +1,176 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import array
+import csv
+import json
+
+# Array type codes used for dictionary codes, from smallest to largest
+_CODE_TYPES = (("B", 1 << 8), ("H", 1 << 16), ("I", 1 << 32))
+
+
+class ColumnarReport(object):
+    """ Accumulates the rows of a report in columns of dictionary-encoded values.
+
+    Each distinct value of a column is stored once, and each row stores only a small integer code per column in an
+    array. Repeated values such as host names and statuses therefore cost one or two bytes per row. The report can be
+    written as CSV, as newline-delimited JSON, or converted to an Arrow table or Parquet file when pyarrow is installed.
+    """
+
+    def __init__(self, columns):
+        """ Creates an empty report.
+
+        :param columns: The list of column titles.
+        """
+
+        self.columns = list(columns)
+        self._codes = [array.array(_CODE_TYPES[0][0]) for _ in self.columns]
+        self._dictionaries = [[] for _ in self.columns]
+        self._code_lookups = [{} for _ in self.columns]
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """ Creates a report from an iterable of rows.
+
+        :param columns: The list of column titles.
+        :param rows: An iterable of lists whose items correspond to the columns.
+        :return: A ColumnarReport object.
+        """
+
+        report = cls(columns)
+        for row in rows:
+            report.append(row)
+        return report
+
+    def __len__(self):
+        return len(self._codes[0]) if self._codes else 0
+
+    def append(self, row):
+        """ Adds a row to the report.
+
+        :param row: A list of values whose items correspond to the columns. Values that cannot be used as dictionary
+        keys, such as lists, are stored as strings.
+        """
+
+        if len(row) != len(self.columns):
+            raise ValueError("Expected {} values but the row has {}".format(len(self.columns), len(row)))
+
+        for index, value in enumerate(row):
+            # Encode first, because encoding can replace the array with a wider one
+            code = self._encode(index, value)
+            self._codes[index].append(code)
+
+    def column(self, name):
+        """ Obtains the decoded values of a column.
+
+        :param name: The column title.
+        :return: A list of values.
+        """
+
+        index = self.columns.index(name)
+        dictionary = self._dictionaries[index]
+        return [dictionary[code] for code in self._codes[index]]
+
+    def rows(self):
+        """ Generates the decoded rows of the report.
+
+        :return: A generator of lists whose items correspond to the columns.
+        """
+
+        for row_number in range(len(self)):
+            yield [dictionary[codes[row_number]] for codes, dictionary in zip(self._codes, self._dictionaries)]
+
+    def write_csv(self, sink, include_titles=True):
+        """ Writes the report to a file-like object as comma-separated values.
+
+        :param sink: A file-like object opened in text mode, preferably with newline="".
+        :param include_titles: Set to False to omit the row of column titles.
+        """
+
+        writer = csv.writer(sink)
+        if include_titles:
+            writer.writerow(self.columns)
+        writer.writerows(self.rows())
+
+    def write_ndjson(self, sink):
+        """ Writes the report to a file-like object as newline-delimited JSON, with one object per row.
+
+        :param sink: A file-like object opened in text mode.
+        """
+
+        for row in self.rows():
+            sink.write(json.dumps(dict(zip(self.columns, row)), default=str))
+            sink.write("\n")
+
+    def to_arrow(self):
+        """ Converts the report to an Arrow table with a dictionary-encoded column for each report column.
+
+        :return: A pyarrow.Table object.
+        """
+
+        pa = _import_pyarrow()
+
+        arrays = []
+        for codes, dictionary in zip(self._codes, self._dictionaries):
+            values = [value if value is None or isinstance(value, (bool, int, float, str)) else str(value)
+                      for value in dictionary]
+            arrays.append(pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.uint32()), pa.array(values)))
+
+        return pa.Table.from_arrays(arrays, names=self.columns)
+
+    def write_parquet(self, path):
+        """ Writes the report to a Parquet file.
+
+        :param path: The path of the file to write.
+        """
+
+        _import_pyarrow()
+        import pyarrow.parquet
+
+        pyarrow.parquet.write_table(self.to_arrow(), path)
+
+    def _encode(self, index, value):
+        try:
+            hash(value)
+        except TypeError:
+            value = str(value)
+
+        # Values that compare equal but have different types, such as True, 1 and 1.0, need their own codes
+        key = (type(value), value)
+        code_lookup = self._code_lookups[index]
+        code = code_lookup.get(key)
+        if code is None:
+            code = len(self._dictionaries[index])
+            code_lookup[key] = code
+            self._dictionaries[index].append(value)
+            self._widen(index, code)
+        return code
+
+    def _widen(self, index, code):
+        # Use a larger array type when the dictionary outgrows the current one
+        codes = self._codes[index]
+        for type_code, limit in _CODE_TYPES:
+            if code < limit:
+                if type_code != codes.typecode and array.array(type_code).itemsize > codes.itemsize:
+                    self._codes[index] = array.array(type_code, codes)
+                return
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow and Parquet output. Install it with: pip install pyarrow")
+    return pyarrow
@@ -0,0 +1,317 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import collections
+import sys
+import time
+
+import search_examples
+
+# Computer properties of the protection modules, which are also the names of their Expand values
+PROTECTION_MODULES = ["anti_malware", "firewall", "intrusion_prevention", "integrity_monitoring", "log_inspection",
+                      "web_reputation", "application_control"]
+
+
+class CveRuleIndex(object):
+    """ Maps CVE IDs to the IDs of the intrusion prevention rules that protect against them.
+
+    CVE IDs are stored upper case and interned, and rule IDs are stored in tuples.
+    """
+
+    def __init__(self):
+        self.rule_ids_by_cve = {}
+        self.cves_by_rule = {}
+
+        # The most recent lastUpdated time of the indexed rules, in milliseconds
+        self.last_updated = None
+
+    def rules_for_cve(self, cve_id):
+        """ Obtains the IDs of the intrusion prevention rules for a CVE.
+
+        :param cve_id: The ID of the CVE.
+        :return: A list of rule IDs, which is empty if no rule is found.
+        """
+
+        return list(self.rule_ids_by_cve.get(cve_id.strip().upper(), ()))
+
+    def rules_for_cves(self, cve_ids):
+        """ Obtains the IDs of the intrusion prevention rules for a list of CVEs.
+
+        :param cve_ids: The IDs of the CVEs.
+        :return: A dictionary of CVE IDs with the list of rule IDs for each CVE.
+        """
+
+        return {cve_id: self.rules_for_cve(cve_id) for cve_id in cve_ids}
+
+    def update(self, rule):
+        """ Adds an intrusion prevention rule to the index, or replaces the CVEs that were indexed for the rule.
+
+        :param rule: An IntrusionPreventionRule object.
+        """
+
+        self.remove(rule.id)
+
+        cves = tuple(sys.intern(cve.strip().upper()) for cve in (rule.cve or ()))
+        if cves:
+            self.cves_by_rule[rule.id] = cves
+            for cve in cves:
+                self.rule_ids_by_cve[cve] = self.rule_ids_by_cve.get(cve, ()) + (rule.id,)
+
+        if rule.last_updated is not None and (self.last_updated is None or rule.last_updated > self.last_updated):
+            self.last_updated = rule.last_updated
+
+    def remove(self, rule_id):
+        """ Removes an intrusion prevention rule from the index.
+
+        :param rule_id: The ID of the rule.
+        """
+
+        for cve in self.cves_by_rule.pop(rule_id, ()):
+            rule_ids = tuple(indexed_rule_id for indexed_rule_id in self.rule_ids_by_cve[cve] if indexed_rule_id != rule_id)
+            if rule_ids:
+                self.rule_ids_by_cve[cve] = rule_ids
+            else:
+                del self.rule_ids_by_cve[cve]
+
+    def refresh(self, api, configuration, api_version, api_exception, full=False):
+        """ Updates the index with the rules that were updated since the most recent rule in the index.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param api_version: The version of the API to use.
+        :param api_exception: The Deep Security API exception module.
+        :param full: Set to True to download all rules again, which also removes rules that were deleted.
+        """
+
+        search_criteria = None
+        if full or self.last_updated is None:
+            self.rule_ids_by_cve = {}
+            self.cves_by_rule = {}
+        else:
+            # Set search criteria for the rules that were updated since the last refresh
+            updated_criteria = api.SearchCriteria()
+            updated_criteria.field_name = "lastUpdated"
+            updated_criteria.first_date_value = self.last_updated
+            updated_criteria.last_date_value = int(round(time.time() * 1000))
+            updated_criteria.first_date_inclusive = True
+            updated_criteria.last_date_inclusive = True
+            search_criteria = [updated_criteria]
+
+        for rule in search_examples.iter_intrusion_prevention_rules(api, configuration, api_version, api_exception,
+                                                                    search_criteria):
+            self.update(rule)
+
+
+class IntrusionPreventionRuleIndex(object):
+    """ Maps intrusion prevention rule IDs to the IDs of the computers that have the rule, and computer IDs to their rules.
+    """
+
+    def __init__(self):
+        self.computer_ids_by_rule = {}
+        self.rule_ids_by_computer = {}
+
+    def computers_with_rule(self, rule_id):
+        """ Obtains the IDs of the computers that have an intrusion prevention rule assigned.
+
+        :param rule_id: The ID of the rule.
+        :return: A set of computer IDs.
+        """
+
+        return set(self.computer_ids_by_rule.get(rule_id, ()))
+
+    def computers_without_rule(self, rule_id):
+        """ Obtains the IDs of the computers that do not have an intrusion prevention rule assigned.
+
+        :param rule_id: The ID of the rule.
+        :return: A set of computer IDs.
+        """
+
+        return self.rule_ids_by_computer.keys() - self.computer_ids_by_rule.get(rule_id, set())
+
+    def rules_on_computer(self, computer_id):
+        """ Obtains the IDs of the intrusion prevention rules that are assigned to a computer.
+
+        :param computer_id: The ID of the computer.
+        :return: A frozenset of rule IDs, or None if the computer is not in the index.
+        """
+
+        return self.rule_ids_by_computer.get(computer_id)
+
+    def update(self, computer):
+        """ Adds a computer to the index, or replaces the rules that were indexed for the computer.
+
+        :param computer: A Computer object that includes intrusion prevention information.
+        """
+
+        rule_ids = frozenset(computer.intrusion_prevention.rule_ids or ())
+        previous_rule_ids = self.rule_ids_by_computer.get(computer.id, frozenset())
+
+        for rule_id in previous_rule_ids - rule_ids:
+            self._discard(rule_id, computer.id)
+        for rule_id in rule_ids - previous_rule_ids:
+            self.computer_ids_by_rule.setdefault(rule_id, set()).add(computer.id)
+
+        self.rule_ids_by_computer[computer.id] = rule_ids
+
+    def remove(self, computer_id):
+        """ Removes a computer from the index.
+
+        :param computer_id: The ID of the computer.
+        """
+
+        for rule_id in self.rule_ids_by_computer.pop(computer_id, ()):
+            self._discard(rule_id, computer_id)
+
+    def refresh(self, api, configuration, api_version, api_exception, computer_ids=None):
+        """ Updates the index with the current rule assignments from Deep Security Manager.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param api_version: The version of the API to use.
+        :param api_exception: The Deep Security API exception module.
+        :param computer_ids: The IDs of the computers that changed. If None, all computers are swept and computers that
+        no longer exist are removed from the index.
+        """
+
+        # Include Intrusion Prevention information in the returned Computer objects
+        expand = api.Expand(api.Expand.intrusion_prevention)
+
+        _refresh_computers(api, configuration, api_version, api_exception, expand, computer_ids, self.update,
+                           self.remove, lambda: self.rule_ids_by_computer.keys())
+
+    def _discard(self, rule_id, computer_id):
+        computer_ids = self.computer_ids_by_rule.get(rule_id)
+        if computer_ids is not None:
+            computer_ids.discard(computer_id)
+            if not computer_ids:
+                del self.computer_ids_by_rule[rule_id]
+
+
+class ModuleStateRollup(object):
+    """Counts computers by (module state, agent status, appliance status) for each protection module.
+
+    Only the counters and one small tuple per computer are kept, so that a computer can be updated or removed without
+    sweeping all computers again.
+    """
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self._computer_states = {}
+
+    def counts(self, module, policy_id=None, group_id=None):
+        """Obtains the number of computers for each state of a module.
+
+        :param module: The protection module, one of PROTECTION_MODULES.
+        :param policy_id: Set to count only the computers that are assigned this policy.
+        :param group_id: Set to count only the computers in this computer group. Ignored when policy_id is set.
+        :return: A Counter of (module state, agent status, appliance status) tuples.
+        """
+
+        if policy_id is not None:
+            scope = ("policy", policy_id)
+        elif group_id is not None:
+            scope = ("group", group_id)
+        else:
+            scope = ("all", None)
+
+        counts = collections.Counter()
+        for key, count in self.counters.items():
+            if key[:3] == scope + (module,):
+                counts[key[3:]] = count
+        return counts
+
+    def update(self, computer):
+        """Adds a computer to the counters, or replaces the counts of a computer that was already added.
+
+        :param computer: A Computer object that includes the information of every protection module.
+        """
+
+        self.remove(computer.id)
+
+        module_states = []
+        for module in PROTECTION_MODULES:
+            module_states.append(self._module_state(getattr(computer, module, None)))
+
+        computer_state = (computer.policy_id, computer.group_id, tuple(module_states))
+        self._computer_states[computer.id] = computer_state
+        self._count(computer_state, 1)
+
+    def remove(self, computer_id):
+        """Removes a computer from the counters.
+
+        :param computer_id: The ID of the computer.
+        """
+
+        computer_state = self._computer_states.pop(computer_id, None)
+        if computer_state is not None:
+            self._count(computer_state, -1)
+
+    def refresh(self, api, configuration, api_version, api_exception, computer_ids=None):
+        """Updates the counters with the current state of computers from Deep Security Manager.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param api_version: The version of the API to use.
+        :param api_exception: The Deep Security API exception module.
+        :param computer_ids: The IDs of the computers that changed. If None, all computers are swept and computers that
+        no longer exist are removed from the counters.
+        """
+
+        # Include the information of every protection module in the returned Computer objects
+        expand = api.Expand(*[getattr(api.Expand, module) for module in PROTECTION_MODULES])
+
+        _refresh_computers(api, configuration, api_version, api_exception, expand, computer_ids, self.update,
+                           self.remove, lambda: self._computer_states.keys())
+
+    def _count(self, computer_state, increment):
+        policy_id, group_id, module_states = computer_state
+        for module, module_state in zip(PROTECTION_MODULES, module_states):
+            for scope in (("all", None), ("policy", policy_id), ("group", group_id)):
+                key = scope + (module,) + module_state
+                self.counters[key] += increment
+                if not self.counters[key]:
+                    del self.counters[key]
+
+    @staticmethod
+    def _module_state(module):
+        if module is None:
+            return None, None, None
+        if module.module_status is None:
+            return module.state, None, None
+        return module.state, module.module_status.agent_status, module.module_status.appliance_status
+
+
+def _refresh_computers(api, configuration, api_version, api_exception, expand, computer_ids, update, remove,
+                       indexed_computer_ids):
+    # Sweep all computers and remove the ones that no longer exist, or describe only the computers that changed
+    if computer_ids is None:
+        found_computer_ids = set()
+        for computer in search_examples.iter_computers(api, configuration, api_version, api_exception, expand):
+            update(computer)
+            found_computer_ids.add(computer.id)
+
+        for computer_id in indexed_computer_ids() - found_computer_ids:
+            remove(computer_id)
+        return
+
+    computers_api = api.ComputersApi(api.ApiClient(configuration))
+    for computer_id in computer_ids:
+        try:
+            update(computers_api.describe_computer(computer_id, api_version, expand=expand.list(), overrides=False))
+        except api_exception as e:
+            # The computer was deleted
+            if e.status != 404:
+                raise
+            remove(computer_id)
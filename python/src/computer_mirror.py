@@ -0,0 +1,207 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import sqlite3
+import time
+
+import model_serialization
+import search_examples
+
+# Date properties of computers that change when a computer is modified or its status changes
+DEFAULT_DELTA_FIELDS = ["lastSendPolicyRequest", "lastSendPolicySuccess"]
+
+# Milliseconds that each delta search reaches back before the last watermark, to allow for clock differences
+WATERMARK_OVERLAP_MS = 60 * 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS computers (
+    id INTEGER PRIMARY KEY,
+    host_name TEXT,
+    policy_id INTEGER,
+    relay_list_id INTEGER,
+    group_id INTEGER,
+    aws_account_id TEXT,
+    last_send_policy_success INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS computers_policy_id ON computers (policy_id);
+CREATE INDEX IF NOT EXISTS computers_relay_list_id ON computers (relay_list_id);
+CREATE INDEX IF NOT EXISTS computers_group_id ON computers (group_id);
+CREATE INDEX IF NOT EXISTS computers_aws_account_id ON computers (aws_account_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class ComputerMirror(object):
+    """ A local SQLite copy of the computers of Deep Security Manager.
+
+    The first sync retrieves all computers. Later syncs only search for computers whose delta fields changed since the
+    previous sync, and for computers with an ID greater than the largest stored ID, which finds new computers whose
+    delta fields are still null. Deleted computers, and changes that do not touch the delta fields, such as a new
+    policy, group or name, are only picked up by a full sync, so run one periodically.
+    """
+
+    def __init__(self, path, expand_names=("ec2_virtual_machine_summary",), delta_fields=DEFAULT_DELTA_FIELDS):
+        """ Opens or creates a mirror.
+
+        :param path: The path of the SQLite file.
+        :param expand_names: The names of the Expand values to include in the mirrored computers.
+        :param delta_fields: The date properties of computers that are searched to find changed computers.
+        """
+
+        self.path = path
+        self.expand_names = list(expand_names)
+        self.delta_fields = list(delta_fields)
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self):
+        """ Closes the SQLite file.
+        """
+
+        self._connection.close()
+
+    @property
+    def watermark(self):
+        """ The time that the last sync started, in milliseconds since the epoch, or None if there was no sync.
+        """
+
+        row = self._connection.execute("SELECT value FROM sync_state WHERE key = 'watermark'").fetchone()
+        return None if row is None else int(row[0])
+
+    def sync(self, api, configuration, api_version, api_exception, full=False):
+        """ Updates the mirror with the computers that changed since the last sync.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param api_version: The version of the API to use.
+        :param api_exception: The Deep Security API exception module.
+        :param full: Set to True to retrieve all computers, which also removes computers that were deleted and picks up
+        changes that do not touch the delta fields. The first sync is always a full sync.
+        :return: The number of computers that were added or updated.
+        """
+
+        api_client = api.ApiClient(configuration)
+        expand = api.Expand(*[getattr(api.Expand, name) for name in self.expand_names or ["none"]])
+        sync_started = int(round(time.time() * 1000))
+        watermark = self.watermark
+
+        count = 0
+        with self._connection:
+            if full or watermark is None:
+                found_computer_ids = set()
+                for computer in search_examples.iter_computers(api, configuration, api_version, api_exception, expand):
+                    self._store(api_client, computer)
+                    found_computer_ids.add(computer.id)
+                    count += 1
+                self._delete_missing(found_computer_ids)
+            else:
+                # Computers that were added since the last sync can have null delta fields, so find them by ID
+                updated_computer_ids = set()
+                last_id = self._connection.execute("SELECT MAX(id) FROM computers").fetchone()[0] or 0
+                for computers in search_examples.iter_computer_pages(api, configuration, api_version, api_exception,
+                                                                     expand, last_id=last_id):
+                    for computer in computers:
+                        self._store(api_client, computer)
+                        updated_computer_ids.add(computer.id)
+
+                # Search each delta field separately, because search criteria are combined with AND
+                for field_name in self.delta_fields:
+                    search_criteria = api.SearchCriteria()
+                    search_criteria.field_name = field_name
+                    search_criteria.first_date_value = watermark - WATERMARK_OVERLAP_MS
+                    search_criteria.last_date_value = sync_started
+                    search_criteria.first_date_inclusive = True
+                    search_criteria.last_date_inclusive = True
+
+                    for computer in search_examples.iter_computers(api, configuration, api_version, api_exception,
+                                                                   expand, [search_criteria]):
+                        if computer.id not in updated_computer_ids:
+                            self._store(api_client, computer)
+                            updated_computer_ids.add(computer.id)
+                count = len(updated_computer_ids)
+
+            self._connection.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('watermark', ?)",
+                                     (str(sync_started),))
+
+        return count
+
+    def get_computer(self, api, configuration, computer_id):
+        """ Reads a computer from the mirror.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param computer_id: The ID of the computer.
+        :return: A Computer object, or None if the computer is not in the mirror.
+        """
+
+        computers = self._read(api, configuration, "WHERE id = ?", (computer_id,))
+        return computers[0] if computers else None
+
+    def search_computers_not_updated(self, api, configuration):
+        """ Reads the computers that have not had their policy updated.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :return: A list of Computer objects.
+        """
+
+        return self._read(api, configuration, "WHERE last_send_policy_success IS NULL")
+
+    def search_computers_by_aws_account(self, api, configuration, account_id):
+        """ Reads the EC2 instances that belong to an AWS account.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param account_id: The ID of the AWS account.
+        :return: A list of Computer objects.
+        """
+
+        return self._read(api, configuration, "WHERE aws_account_id = ?", (account_id,))
+
+    def search_computers_with_policy_and_relay_list(self, api, configuration, policy_id, relay_list_id):
+        """ Reads the computers that are assigned to a policy and relay list.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param policy_id: The ID of the policy.
+        :param relay_list_id: The ID of the relay list.
+        :return: A list of Computer objects.
+        """
+
+        return self._read(api, configuration, "WHERE policy_id = ? AND relay_list_id = ?", (policy_id, relay_list_id))
+
+    def _store(self, api_client, computer):
+        ec2_summary = getattr(computer, "ec2_virtual_machine_summary", None)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO computers (id, host_name, policy_id, relay_list_id, group_id, aws_account_id, "
+            "last_send_policy_success, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (computer.id, computer.host_name, computer.policy_id, computer.relay_list_id, computer.group_id,
+             ec2_summary.account_id if ec2_summary is not None else None, computer.last_send_policy_success,
+             json.dumps(model_serialization.to_data(api_client, computer))))
+
+    def _delete_missing(self, found_computer_ids):
+        stored_computer_ids = set(row[0] for row in self._connection.execute("SELECT id FROM computers"))
+        self._connection.executemany("DELETE FROM computers WHERE id = ?",
+                                     [(computer_id,) for computer_id in stored_computer_ids - found_computer_ids])
+
+    def _read(self, api, configuration, where, parameters=()):
+        api_client = api.ApiClient(configuration)
+        rows = self._connection.execute("SELECT data FROM computers " + where + " ORDER BY id", parameters)
+        return [model_serialization.from_data(api_client, json.loads(row[0]), "Computer") for row in rows]
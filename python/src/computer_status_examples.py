@@ -13,8 +13,31 @@
 # limitations under the License.
 #
 
+import datetime
+import io
 
-def check_anti_malware(api, configuration, api_version, api_exception, computer_id):
+import caching
+import client_registry
+import columnar_report
+import computer_indexes
+import fleet_snapshot
+import search_examples
+import search_query
+import worker_pool
+
+# Column titles of the computer status reports
+COMPUTER_STATUS_COLUMNS = ["Host Name", "Agent or Appliance", "Status", "Status Messages", "Tasks"]
+ANTI_MALWARE_STATUS_COLUMNS = ["Host Name", "Module State", "Agent or Appliance", "Status", "Status Message"]
+RECOMMENDATION_SCAN_COLUMNS = ["Host Name", "Date of Last Scan", "Scan Status"]
+
+# Expand values that are needed by the status reports, so that they can run against a single FleetSnapshot
+STATUS_REPORT_EXPANDS = ["computer_status", "anti_malware", "intrusion_prevention"]
+
+# Computer properties of the protection modules, which are also the names of their Expand values
+PROTECTION_MODULES = computer_indexes.PROTECTION_MODULES
+
+
+def check_anti_malware(api, configuration, api_version, api_exception, computer_id, cache=None):
     """ Obtains certain anti-malware properties for a computer.
 
     :param api: The Deep Security API modules.
@@ -22,24 +45,64 @@ def check_anti_malware(api, configuration, api_version, api_exception, computer_
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param computer_id: The ID of the computer.
+    :param cache: Optional TtlLruCache of anti-malware configurations, keyed by configuration ID.
     :return: An AntiMalwareConfigurationsApi object that contains the anti-malware properties of the computer.
     """
 
+    computers_api = api.ComputersApi(api.ApiClient(configuration))
+    am_configs_api = api.AntiMalwareConfigurationsApi(api.ApiClient(configuration))
+    return _check_anti_malware(api, api_version, computers_api, am_configs_api, computer_id, cache)
+
+
+def _check_anti_malware(api, api_version, computers_api, am_configs_api, computer_id, cache):
     # Include Anti-Malware information in the returned Computer object
     expand = api.Expand(api.Expand.anti_malware, api.Expand.computer_settings)
 
     # Get the computer object from Deep Security Manager
-    computers_api = api.ComputersApi(api.ApiClient(configuration))
     computer = computers_api.describe_computer(computer_id, api_version, expand=expand.list(), overrides=False)
 
     # Get the Anti-Malware scan configuration id for the computer
     real_time_scan_configuration_id = computer.anti_malware.real_time_scan_configuration_id
 
     # Get the Anti-Malware properties for the computer
-    am_configs_api = api.AntiMalwareConfigurationsApi(api.ApiClient(configuration))
     if real_time_scan_configuration_id != 0:
         # If the anti-malware module is 'inactive' in the computer, the id will be 0
-        return am_configs_api.describe_anti_malware(real_time_scan_configuration_id, api_version)
+        if cache is None:
+            return am_configs_api.describe_anti_malware(real_time_scan_configuration_id, api_version)
+
+        # Computers that share a configuration obtain it from the cache
+        return cache.get_or_load(real_time_scan_configuration_id, lambda: am_configs_api.describe_anti_malware(
+            real_time_scan_configuration_id, api_version))
+
+
+def check_anti_malware_for_computers(api, configuration, api_version, api_exception, computer_ids, cache=None,
+                                     max_workers=1):
+    """ Obtains certain anti-malware properties for many computers, obtaining each distinct configuration only once.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computer_ids: The IDs of the computers.
+    :param cache: Optional TtlLruCache of anti-malware configurations to reuse across calls. By default a cache is
+    created for this call only.
+    :param max_workers: The maximum number of computers to look up concurrently.
+    :return: A dictionary of computer IDs with the AntiMalwareConfiguration of the computer, or None if the
+    anti-malware module is inactive.
+    """
+
+    if cache is None:
+        cache = caching.TtlLruCache()
+
+    # The workers share the API objects, so that their connections are reused
+    computers_api = client_registry.get_api(api, api.ComputersApi, configuration)
+    am_configs_api = client_registry.get_api(api, api.AntiMalwareConfigurationsApi, configuration)
+
+    def check(computer_id):
+        return _check_anti_malware(api, api_version, computers_api, am_configs_api, computer_id, cache)
+
+    computer_ids = list(computer_ids)
+    return dict(zip(computer_ids, worker_pool.map_in_order(check, computer_ids, max_workers)))
 
 
 def find_rules_for_cve(api, configuration, api_version, api_exception, cve_id):
@@ -76,7 +139,24 @@ def find_rules_for_cve(api, configuration, api_version, api_exception, cve_id):
     return rule_id_s
 
 
-def check_computers_for_ip_rule(api, configuration, api_version, api_exception, rule_id):
+def build_cve_rule_index(api, configuration, api_version, api_exception):
+    """ Creates an index of the intrusion prevention rules for each CVE.
+
+    The rules are downloaded once, one page at a time, and then CVEs are looked up without calling Deep Security Manager.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :return: A CveRuleIndex object.
+    """
+
+    index = computer_indexes.CveRuleIndex()
+    index.refresh(api, configuration, api_version, api_exception)
+    return index
+
+
+def check_computers_for_ip_rule(api, configuration, api_version, api_exception, rule_id, computers=None):
     """ Finds computers that do not have a specific intrusion prevention rule applied.
 
     :param api: The Deep Security API modules.
@@ -84,6 +164,8 @@ def check_computers_for_ip_rule(api, configuration, api_version, api_exception,
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param rule_id: The ID of the rule.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
     :return: A list of computers that do not have the rule applied.
     """
 
@@ -92,12 +174,11 @@ def check_computers_for_ip_rule(api, configuration, api_version, api_exception,
     # Include Intrusion Prevention information in the returned Computer objects
     expand = api.Expand(api.Expand.intrusion_prevention)
 
-    # Create a list of computers
-    computers_api = api.ComputersApi(api.ApiClient(configuration))
-    computers_list = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
+    if computers is None:
+        computers = search_examples.iter_computers(api, configuration, api_version, api_exception, expand)
 
-    # Search the list of computers for those that do not have the IP rule
-    for computer in computers_list.computers:
+    # Search the computers for those that do not have the IP rule
+    for computer in computers:
         computer_ip_list = computer.intrusion_prevention
         if computer_ip_list.rule_ids:
             if rule_id in computer_ip_list.rule_ids:
@@ -105,6 +186,49 @@ def check_computers_for_ip_rule(api, configuration, api_version, api_exception,
     return unprotected_computers
 
 
+def find_computers_without_ip_rule(api, configuration, api_version, api_exception, rule_id, policy_id=None):
+    """ Finds computers that do not have a specific intrusion prevention rule applied, using a query.
+
+    The policy condition is evaluated by Deep Security Manager, and only the rule condition is evaluated on the client.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param rule_id: The ID of the rule.
+    :param policy_id: Optional ID of a policy, to find only the computers that are assigned the policy.
+    :return: A list of computers that do not have the rule applied.
+    """
+
+    query = search_query.Query()
+    if policy_id is not None:
+        query.where(search_query.Field("policyID") == policy_id)
+    query.where(lambda computer: rule_id not in (computer.intrusion_prevention.rule_ids or []))
+
+    # Include Intrusion Prevention information in the returned Computer objects
+    expand = api.Expand(api.Expand.intrusion_prevention)
+
+    return list(query.iter_computers(api, configuration, api_version, api_exception, expand))
+
+
+def build_ip_rule_index(api, configuration, api_version, api_exception):
+    """ Creates an index of the intrusion prevention rules that are assigned to each computer.
+
+    The index is built with one sweep of the computers and then answers which computers have or lack a rule without
+    calling Deep Security Manager.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :return: An IntrusionPreventionRuleIndex object.
+    """
+
+    index = computer_indexes.IntrusionPreventionRuleIndex()
+    index.refresh(api, configuration, api_version, api_exception)
+    return index
+
+
 def apply_rule_to_policies(api, configuration, api_version, api_exception, computers, rule_id):
     """ Adds an Intrusion Prevention rule to the policies of a list of computers.
 
@@ -126,10 +250,10 @@ def apply_rule_to_policies(api, configuration, api_version, api_exception, compu
     # Store modified policies
     modified_policies = []
 
+    policies_api = client_registry.get_api(api, api.PoliciesApi, configuration)
     for policy_id in policy_ids:
         try:
             # Get the current list of rules from the policy
-            policies_api = api.PoliciesApi(api.ApiClient(configuration))
             current_rules = policies_api.describe_policy(policy_id, api_version, overrides=False)
 
             # Add the rule_id if it doesn't already exist in current_rules
@@ -157,6 +281,58 @@ def apply_rule_to_policies(api, configuration, api_version, api_exception, compu
     return modified_policies
 
 
+def apply_rule_to_policies_bulk(api, configuration, api_version, api_exception, computers, rule_id, max_workers=10):
+    """ Adds an Intrusion Prevention rule to the policies of a list of computers, modifying each policy at most once.
+
+    The policies are obtained and modified concurrently, and policies that already include the rule are not modified.
+    An error for one policy does not stop the other policies from being processed.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computers: The Computer objects whose policies are modified.
+    :param rule_id: The ID of the Intrusion Prevention rule to add.
+    :param max_workers: The maximum number of policies to process concurrently.
+    :return: A dictionary of policy IDs with the modified Policy object, None if the policy already had the rule,
+    or the exception that was raised for the policy.
+    """
+
+    # Collapse the policies of the computers to unique IDs
+    policy_ids = sorted(set(computer.policy_id for computer in computers if computer.policy_id))
+
+    policies_api = client_registry.get_api(api, api.PoliciesApi, configuration)
+
+    def add_rule_to_policy(policy_id):
+        try:
+            # Get the current list of rules from the policy
+            current_policy = policies_api.describe_policy(policy_id, api_version, overrides=False)
+            rule_ids = current_policy.intrusion_prevention.rule_ids or []
+
+            # Only modify policies that do not have the rule
+            if rule_id in rule_ids:
+                return None
+
+            # Add the new and existing intrusion prevention rules to a policy
+            intrusion_prevention_policy_extension = api.IntrusionPreventionPolicyExtension()
+            intrusion_prevention_policy_extension.rule_ids = rule_ids + [rule_id]
+            policy = api.Policy()
+            policy.intrusion_prevention = intrusion_prevention_policy_extension
+
+            # Configure sending policy updates when the policy changes
+            policy.auto_requires_update = "on"
+
+            # Modify the policy on Deep Security Manager
+            return policies_api.modify_policy(policy_id, policy, api_version)
+
+        except Exception as e:
+            # Errors such as timeouts after the last retry are also results, so the other policies are still reported
+            return e
+
+    results = worker_pool.map_in_order(add_rule_to_policy, policy_ids, max_workers)
+    return dict(zip(policy_ids, results))
+
+
 def get_intrusion_prevention_recommendations(api, configuration, api_version, api_exception, computer_id):
     """Obtains the list of recommended intrusion prevention rules to apply to a computer, according to the results of the last recommendation scan.
 
@@ -187,21 +363,74 @@ def get_computer_statuses(api, configuration, api_version, api_exception):
     :return: A string that can be saved as a CSV file.
     """
 
-    # Add column titles to comma-separated values string
-    csv = "Host Name,Agent or Appliance,Status,Status Messages,Tasks\r\n"
+    csv = io.StringIO()
+    write_computer_statuses(api, configuration, api_version, api_exception, csv)
+    return csv.getvalue()
+
+
+def get_computer_statuses_columnar(api, configuration, api_version, api_exception, computers=None):
+    """Obtains agent and appliance status for all computers as a columnar report.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A ColumnarReport object that can be written as CSV, NDJSON, Arrow, or Parquet.
+    """
+
+    rows = iter_computer_statuses(api, configuration, api_version, api_exception, computers)
+    return columnar_report.ColumnarReport.from_rows(COMPUTER_STATUS_COLUMNS, rows)
+
+
+def write_computer_statuses(api, configuration, api_version, api_exception, sink, computers=None):
+    """Writes agent and appliance status for all computers to a file-like object as comma-separated values.
+
+    Each row is written as soon as its computer is processed, so the report is never held in memory.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param sink: A file-like object that has a write method, such as a CSV file opened with newline="" because the
+    rows end with \r\n.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: The number of rows that were written, excluding the column titles.
+    """
+
+    # Add column titles to the sink
+    sink.write(format_for_csv(COMPUTER_STATUS_COLUMNS))
+
+    rows = iter_computer_statuses(api, configuration, api_version, api_exception, computers)
+    return write_csv_rows(sink, rows)
+
+
+def iter_computer_statuses(api, configuration, api_version, api_exception, computers=None):
+    """Generates a row of agent or appliance status for each computer that has a problem.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A generator of lists whose items correspond to COMPUTER_STATUS_COLUMNS.
+    """
 
     # Include computer status information in the returned Computer objects
     expand = api.Expand(api.Expand.computer_status)
 
-    # Get all computers
-    computers_api = api.ComputersApi(api.ApiClient(configuration))
-    computers = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
-
-    for computer in computers.computers:
-        computer_info = []
+    # Get all computers, one page at a time
+    if computers is None:
+        computers = search_examples.iter_computers(api, configuration, api_version, api_exception, expand)
 
+    for computer in computers:
         # Report on computers with no agent or appliance
         if computer.agent_finger_print is None and computer.appliance_finger_print is None:
+            computer_info = []
+
             # Hostname and protection type
             computer_info.append(computer.host_name)
             computer_info.append("None")
@@ -213,8 +442,10 @@ def get_computer_statuses(api, configuration, api_version, api_exception):
                 status_messages = str(computer.computer_status.agent_status_messages)
             computer_info.append(status_messages)
 
-            # Add the computer info to the CSV string
-            csv += format_for_csv(computer_info)
+            # No tasks without an agent or appliance
+            computer_info.append("")
+
+            yield computer_info
 
         else:
             # Report on problem agents and appliances
@@ -223,6 +454,8 @@ def get_computer_statuses(api, configuration, api_version, api_exception):
 
             # Agent is installed but is not active
             if computer.agent_finger_print is not None and agent_status != "active":
+                computer_info = []
+
                 # Hostname and protection type
                 computer_info.append(computer.host_name)
                 computer_info.append("Agent")
@@ -243,11 +476,12 @@ def get_computer_statuses(api, configuration, api_version, api_exception):
                 else:
                     computer_info.append("")
 
-                # Add the computer info to the CSV string
-                csv += format_for_csv(computer_info)
+                yield computer_info
 
             # Appliance is installed but is not active
             if computer.appliance_finger_print is not None and appliance_status != "active":
+                computer_info = []
+
                 # Hostname and protection type
                 computer_info.append(computer.host_name)
                 computer_info.append("Appliance")
@@ -268,10 +502,7 @@ def get_computer_statuses(api, configuration, api_version, api_exception):
                 else:
                     computer_info.append("")
 
-                # Add the computer info to the CSV string
-                csv += format_for_csv(computer_info)
-
-    return csv
+                yield computer_info
 
 
 def get_anti_malware_status_for_computers(api, configuration, api_version, api_exception):
@@ -287,20 +518,70 @@ def get_anti_malware_status_for_computers(api, configuration, api_version, api_e
     :return: A string that can be saved as a CSV file.
     """
 
-    # Add column titles to comma-separated values string
-    csv = "Host Name,Module State,Agent or Appliance,Status,Status Message\r\n"
+    csv = io.StringIO()
+    write_anti_malware_status_for_computers(api, configuration, api_version, api_exception, csv)
+    return csv.getvalue()
+
+
+def get_anti_malware_status_for_computers_columnar(api, configuration, api_version, api_exception, computers=None):
+    """Obtains agent and appliance status for the Anti-Malware module of all computers as a columnar report.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A ColumnarReport object that can be written as CSV, NDJSON, Arrow, or Parquet.
+    """
+
+    rows = iter_anti_malware_status_for_computers(api, configuration, api_version, api_exception, computers)
+    return columnar_report.ColumnarReport.from_rows(ANTI_MALWARE_STATUS_COLUMNS, rows)
+
+
+def write_anti_malware_status_for_computers(api, configuration, api_version, api_exception, sink, computers=None):
+    """Writes agent and appliance status for the Anti-Malware module of all computers to a file-like object.
+
+    Each row is written as soon as its computer is processed, so the report is never held in memory.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param sink: A file-like object that has a write method, such as a CSV file opened with newline="" because the
+    rows end with \r\n.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: The number of rows that were written, excluding the column titles.
+    """
+
+    # Add column titles to the sink
+    sink.write(format_for_csv(ANTI_MALWARE_STATUS_COLUMNS))
+
+    rows = iter_anti_malware_status_for_computers(api, configuration, api_version, api_exception, computers)
+    return write_csv_rows(sink, rows)
+
+
+def iter_anti_malware_status_for_computers(api, configuration, api_version, api_exception, computers=None):
+    """Generates a row for each agent or appliance where the Anti-Malware module is not active.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A generator of lists whose items correspond to ANTI_MALWARE_STATUS_COLUMNS.
+    """
 
     # Include Anti-Malware information in the returned Computer objects
     expand = api.Expand(api.Expand.anti_malware)
 
-    computers_api = api.ComputersApi(api.ApiClient(configuration))
-    computers = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
-
-    # Get the list of computers and iterate over it
-    for computer in computers.computers:
-        # Module information to add to the CSV string
-        module_info = []
+    # Get the computers one page at a time and iterate over them
+    if computers is None:
+        computers = search_examples.iter_computers(api, configuration, api_version, api_exception, expand)
 
+    for computer in computers:
         # Check that the computer has a an agent or appliance status
         if computer.anti_malware.module_status:
             agent_status = computer.anti_malware.module_status.agent_status
@@ -311,6 +592,8 @@ def get_anti_malware_status_for_computers(api, configuration, api_version, api_e
 
         # Agents that are not active for the module
         if agent_status and agent_status != "active":
+            module_info = []
+
             # Host name
             module_info.append(computer.host_name)
 
@@ -322,29 +605,50 @@ def get_anti_malware_status_for_computers(api, configuration, api_version, api_e
             module_info.append(agent_status)
             module_info.append(computer.anti_malware.module_status.agent_status_message)
 
-            # Add the module info to the CSV string
-            csv += format_for_csv(module_info)
+            yield module_info
 
         # Appliances that are not active for the module
         if appliance_status and appliance_status != "active":
+            module_info = []
+
             # Host name
             module_info.append(computer.host_name)
-    
+
             # Module state
             module_info.append(computer.anti_malware.state)
-    
+
             # Appliance status and status message
             module_info.append("Appliance")
             module_info.append(appliance_status)
             module_info.append(computer.anti_malware.module_status.appliance_status_message)
-    
-            # Add the module info to the CSV string
-            csv += format_for_csv(module_info)
 
-    return csv
+            yield module_info
+
+
+def get_module_state_rollup(api, configuration, api_version, api_exception, computers=None):
+    """Counts the computers by module state and agent and appliance status, for every protection module.
 
+    The counts are computed in a single sweep of the computers, for all computers and per policy and computer group.
 
-def get_date_of_last_recommendation_scan(api, configuration, api_version, api_exception):
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A ModuleStateRollup object.
+    """
+
+    rollup = computer_indexes.ModuleStateRollup()
+    if computers is None:
+        rollup.refresh(api, configuration, api_version, api_exception)
+    else:
+        for computer in computers:
+            rollup.update(computer)
+    return rollup
+
+
+def get_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, max_workers=1):
     """For every computer, obtains the date that the last recommendation scan ran and the scan status.
 
     Returns the information as a list of comma-separated values.
@@ -353,31 +657,95 @@ def get_date_of_last_recommendation_scan(api, configuration, api_version, api_ex
     :param configuration: Configuration object to pass to the api client.
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
+    :param max_workers: The maximum number of computers to look up concurrently.
     :return: A string that can be saved as a CSV file.
     """
 
-    import datetime
+    csv = io.StringIO()
+    write_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, csv, max_workers)
+    return csv.getvalue()
+
+
+def get_date_of_last_recommendation_scan_columnar(api, configuration, api_version, api_exception, max_workers=1,
+                                                  computers=None):
+    """For every computer, obtains the date of the last recommendation scan and the scan status as a columnar report.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param max_workers: The maximum number of computers to look up concurrently.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A ColumnarReport object that can be written as CSV, NDJSON, Arrow, or Parquet.
+    """
+
+    rows = iter_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, max_workers, computers)
+    return columnar_report.ColumnarReport.from_rows(RECOMMENDATION_SCAN_COLUMNS, rows)
+
+
+def write_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, sink, max_workers=1,
+                                           computers=None):
+    """For every computer, writes the date of the last recommendation scan and the scan status to a file-like object.
+
+    Each row is written as soon as its computer is processed, so the report is never held in memory.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param sink: A file-like object that has a write method, such as a CSV file opened with newline="" because the
+    rows end with \r\n.
+    :param max_workers: The maximum number of computers to look up concurrently.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: The number of rows that were written, excluding the date and column titles.
+    """
+
+    # Add the current date and column titles to the sink
+    sink.write(datetime.datetime.now().strftime("%Y-%m-%d %H:%M") + "\r\n")
+    sink.write(format_for_csv(RECOMMENDATION_SCAN_COLUMNS))
 
-    # Add the current date and column titles to comma-separated values string
-    csv = datetime.datetime.now().strftime("%Y-%m-%d %H:%M") + "\r\n"
-    csv += "Host Name,Date of Last Scan,Scan Status\r\n"
+    rows = iter_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, max_workers, computers)
+    return write_csv_rows(sink, rows)
+
+
+def iter_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, max_workers=1,
+                                          computers=None):
+    """Generates a row with the date and status of the last recommendation scan for every computer.
+
+    The recommendation scan information is obtained with one call per computer. When max_workers is greater than 1,
+    up to max_workers of these calls run concurrently and the rows are still generated in the order of the computers.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param max_workers: The maximum number of computers to look up concurrently.
+    :param computers: Optional iterable of Computer objects to report on, such as a FleetSnapshot. By default the
+    computers are retrieved from Deep Security Manager.
+    :return: A generator of lists whose items correspond to RECOMMENDATION_SCAN_COLUMNS.
+    """
 
     # Include minimal information in the returned Computer objects
     expand = api.Expand(api.Expand.none)
 
-    # Get the list of computers and iterate over it
-    computers_api = api.ComputersApi(api.ApiClient(configuration))
-    computers = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
+    # Get the computers one page at a time
+    if computers is None:
+        computers = search_examples.iter_computers(api, configuration, api_version, api_exception, expand)
 
     computer_ips_assignments_recommendations_api = (
         api.ComputerIntrusionPreventionRuleAssignmentsRecommendationsApi(api.ApiClient(configuration)))
-    for computer in computers.computers:
+
+    def get_recommendation_scan_info(computer):
         # Get the recommendation scan information
-        intrusion_prevention_assignments = (
-            computer_ips_assignments_recommendations_api.list_intrusion_prevention_rule_ids_on_computer(
-                computer.id,
-                api_version,
-                overrides=False))
+        return computer, computer_ips_assignments_recommendations_api.list_intrusion_prevention_rule_ids_on_computer(
+            computer.id,
+            api_version,
+            overrides=False)
+
+    for computer, intrusion_prevention_assignments in worker_pool.map_in_order(
+            get_recommendation_scan_info, computers, max_workers):
         reco_scan_info = list()
 
         # Computer name
@@ -393,10 +761,51 @@ def get_date_of_last_recommendation_scan(api, configuration, api_version, api_ex
         # Scan status
         reco_scan_info.append(intrusion_prevention_assignments.recommendation_scan_status)
 
-        # Add to the CSV string
-        csv += format_for_csv(reco_scan_info)
+        yield reco_scan_info
+
+
+def write_status_report_pack(api, configuration, api_version, api_exception, computer_status_sink,
+                             anti_malware_sink, recommendation_scan_sink, max_workers=1, snapshot=None):
+    """Writes the computer status, Anti-Malware status, and recommendation scan reports with a single sweep of the computers.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computer_status_sink: A file-like object for the computer status report.
+    :param anti_malware_sink: A file-like object for the Anti-Malware status report.
+    :param recommendation_scan_sink: A file-like object for the recommendation scan report.
+    :param max_workers: The maximum number of computers to look up concurrently for the recommendation scan report.
+    :param snapshot: Optional FleetSnapshot that includes STATUS_REPORT_EXPANDS. By default a snapshot is captured.
+    :return: The FleetSnapshot that the reports ran against, which other reports can reuse.
+    """
+
+    if snapshot is None:
+        snapshot = fleet_snapshot.FleetSnapshot.capture(api, configuration, api_version, api_exception,
+                                                        STATUS_REPORT_EXPANDS)
+
+    write_computer_statuses(api, configuration, api_version, api_exception, computer_status_sink, snapshot)
+    write_anti_malware_status_for_computers(api, configuration, api_version, api_exception, anti_malware_sink,
+                                            snapshot)
+    write_date_of_last_recommendation_scan(api, configuration, api_version, api_exception, recommendation_scan_sink,
+                                           max_workers, snapshot)
+    return snapshot
+
+
+def write_csv_rows(sink, rows):
+    """Writes rows to a file-like object as comma-separated values, one row at a time.
+
+    :param sink: A file-like object that has a write method.
+    :param rows: An iterable of lists to write.
+    :return: The number of rows that were written.
+    """
+
+    count = 0
+    for row in rows:
+        sink.write(format_for_csv(row))
+        count += 1
 
-    return csv
+    return count
 
 
 def format_for_csv(line_item):
@@ -0,0 +1,204 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import array
+import bisect
+import time
+
+import search_examples
+
+
+class FleetSnapshot(object):
+    """ The computers of Deep Security Manager, retrieved once with all of the information that a set of reports needs.
+
+    Iterating over a snapshot generates its Computer objects in order of ID, so a snapshot can be passed to any
+    report function that accepts a computers argument. The snapshot holds the full Computer objects with every
+    section of expand_names, so its memory use grows with the number of Expand values: capture only the ones that
+    the reports need.
+    """
+
+    def __init__(self, computers, expand_names, captured=None):
+        """ Creates a snapshot from Computer objects that were already retrieved.
+
+        :param computers: An iterable of Computer objects.
+        :param expand_names: The names of the Expand values that were included in the computers, such as
+        "computer_status".
+        :param captured: The time that the computers were retrieved, in seconds since the epoch. Defaults to now.
+        """
+
+        self.computers = tuple(sorted(computers, key=lambda computer: computer.id))
+        self.expand_names = frozenset(expand_names)
+        self.captured = time.time() if captured is None else captured
+        self._ids = array.array("q", (computer.id for computer in self.computers))
+
+    @classmethod
+    def capture(cls, api, configuration, api_version, api_exception, expand_names,
+                page_size=search_examples.DEFAULT_PAGE_SIZE):
+        """ Retrieves all computers in a single sweep that includes the union of the information that is needed.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param api_version: The version of the API to use.
+        :param api_exception: The Deep Security API exception module.
+        :param expand_names: The names of the Expand values that the reports need, such as ["computer_status",
+        "anti_malware"]. Duplicates and "none" are ignored.
+        :param page_size: The maximum number of computers to retrieve with each call.
+        :return: A FleetSnapshot object.
+        """
+
+        expand_names = sorted(set(expand_names) - {"none"})
+        expand = api.Expand(*[getattr(api.Expand, name) for name in expand_names or ["none"]])
+
+        captured = time.time()
+        computers = search_examples.iter_computers(api, configuration, api_version, api_exception, expand,
+                                                   page_size=page_size)
+        return cls(computers, expand_names, captured)
+
+    def __iter__(self):
+        return iter(self.computers)
+
+    def __len__(self):
+        return len(self.computers)
+
+    def __contains__(self, computer_id):
+        return self._position(computer_id) is not None
+
+    def get(self, computer_id):
+        """ Obtains a computer from the snapshot.
+
+        :param computer_id: The ID of the computer.
+        :return: The Computer object, or None if the computer is not in the snapshot.
+        """
+
+        position = self._position(computer_id)
+        return None if position is None else self.computers[position]
+
+    def _position(self, computer_id):
+        # The IDs are sorted, so a binary search finds the position without a dictionary of every ID
+        position = bisect.bisect_left(self._ids, computer_id)
+        if position < len(self._ids) and self._ids[position] == computer_id:
+            return position
+        return None
+
+    def covers(self, expand_names):
+        """ Checks whether the snapshot includes the information of a set of Expand values.
+
+        :param expand_names: The names of the Expand values.
+        :return: True if every Expand value was included when the snapshot was captured.
+        """
+
+        return set(expand_names) - {"none"} <= self.expand_names
+
+
+# The attributes that ComputerIndex indexes, and the Expand value that each one needs
+INDEXED_ATTRIBUTES = {
+    "policy_id": None,
+    "relay_list_id": None,
+    "group_id": None,
+    "account_id": "ec2_virtual_machine_summary",
+}
+
+
+class ComputerIndex(object):
+    """ Hash indexes on the policy, relay list, computer group and AWS account of the computers in a snapshot.
+
+    Lookups on several attributes are resolved by intersecting the sets of computer IDs of each attribute, so the
+    computers with a specific policy and relay list are found without searching Deep Security Manager.
+    """
+
+    def __init__(self, snapshot):
+        """ Indexes the computers of a snapshot. The AWS account is indexed only if the snapshot includes the
+        ec2_virtual_machine_summary Expand value.
+
+        :param snapshot: A FleetSnapshot object.
+        """
+
+        self.attributes = tuple(attribute for attribute, expand_name in INDEXED_ATTRIBUTES.items()
+                                if expand_name is None or snapshot.covers([expand_name]))
+        self._computers = {}
+        self._indexes = {attribute: {} for attribute in self.attributes}
+        for computer in snapshot:
+            self.update(computer)
+
+    def find(self, **values):
+        """ Finds the computers that have all of the specified attribute values, such as
+        find(policy_id=1, relay_list_id=2).
+
+        :param values: The values to match, keyed by attribute name: policy_id, relay_list_id, group_id or account_id.
+        :return: A list of the matching Computer objects, in order of ID.
+        """
+
+        id_sets = []
+        for attribute, value in values.items():
+            if attribute not in self._indexes:
+                raise ValueError("Computers are not indexed on " + attribute)
+            id_sets.append(self._indexes[attribute].get(value, set()))
+
+        if not id_sets:
+            return [self._computers[computer_id] for computer_id in sorted(self._computers)]
+
+        # Start from the smallest set so that each intersection is as cheap as possible
+        id_sets.sort(key=len)
+        ids = set(id_sets[0])
+        for id_set in id_sets[1:]:
+            if not ids:
+                break
+            ids &= id_set
+        return [self._computers[computer_id] for computer_id in sorted(ids)]
+
+    def values(self, attribute):
+        """ Obtains the distinct values of an indexed attribute.
+
+        :param attribute: The attribute name.
+        :return: A set of the values.
+        """
+
+        return set(self._indexes[attribute])
+
+    def update(self, computer):
+        """ Adds a computer to the index, or replaces the indexed values of a computer that changed.
+
+        :param computer: The Computer object.
+        """
+
+        self.remove(computer.id)
+        self._computers[computer.id] = computer
+        for attribute, index in self._indexes.items():
+            index.setdefault(_attribute_value(computer, attribute), set()).add(computer.id)
+
+    def remove(self, computer_id):
+        """ Removes a computer from the index.
+
+        :param computer_id: The ID of the computer.
+        """
+
+        computer = self._computers.pop(computer_id, None)
+        if computer is None:
+            return
+        for attribute, index in self._indexes.items():
+            value = _attribute_value(computer, attribute)
+            index[value].discard(computer_id)
+            if not index[value]:
+                del index[value]
+
+    def __len__(self):
+        return len(self._computers)
+
+
+def _attribute_value(computer, attribute):
+    if attribute == "account_id":
+        summary = computer.ec2_virtual_machine_summary
+        return None if summary is None else summary.account_id
+    return getattr(computer, attribute)
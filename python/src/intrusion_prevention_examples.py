@@ -13,6 +13,8 @@
 # limitations under the License.
 #
 
+import search_examples
+
 
 def modify_intrusion_prevention_policy(api, configuration, api_version, api_exception, policy_id, rule_ids):
     """ Turns on the automatic application of recommendation scans for intrusion prevention in a policy.
@@ -65,12 +67,8 @@ def get_assigned_intrusion_prevention_rules(api, configuration, api_version, api
     # Include Intrusion Prevention information in the returned Computer objects
     expand = api.Expand(api.Expand.intrusion_prevention)
 
-    # Retrieve computers from Deep Security Manager
-    computers_api = api.ComputersApi(api.ApiClient(configuration))
-    computers_list = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
-
-    # Extract intrusion prevention rules from the computers
+    # Extract intrusion prevention rules from the computers, retrieving them one page at a time
     im_rules = {}
-    for computer in computers_list.computers:
+    for computer in search_examples.iter_computers(api, configuration, api_version, api_exception, expand):
         im_rules[computer.host_name] = computer.intrusion_prevention.rule_ids
     return im_rules
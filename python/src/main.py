@@ -18,6 +18,7 @@ from deepsecurity.rest import ApiException as api_exception
 import urllib3
 import os
 import json
+import asyncio
 
 # Import code example files for testing
 import anti_malware_examples
@@ -41,6 +42,13 @@ import computer_override_examples
 import scheduled_task_examples
 import role_examples
 import rate_limit_examples
+import rate_limiter
+import retry_middleware
+import request_coalescing
+import client_registry
+import computer_mirror
+import fleet_snapshot
+import search_cache
 import gcpconnector_example
 
 # Uncomment to allow connections that are 'secured' with self-signed certificate
@@ -62,6 +70,18 @@ configuration.api_key['api-secret-key'] = secret_key
 
 api_version = 'v1'
 
+# Retry API calls of all examples that fail because Deep Security Manager is busy or unavailable
+retry_middleware.install(api)
+
+# Share kept-alive connections to Deep Security Manager between the API objects of all examples
+client_registry.configure(api, connection_pool_maxsize=20)
+
+# Uncomment to limit the rate of API calls of all examples, in calls per second for each class of endpoint
+# rate_limiter.install(api, rate_limiter.RateLimiter(search=10, describe=20, modify=5))
+
+# Uncomment to make identical describe, list and search calls that run at the same time share one call
+# request_coalescing.install(api)
+
 # Values for use in examples
 
 # policy_id for Rate Limit example
@@ -177,6 +197,11 @@ def main():
         str(rate_limit_examples.set_computer_policy_check_rate_limit(
             api, configuration, api_version, api_exception, computer_ids, policy_id))
     )
+    print(
+        "Displaying results from rate_limit_examples.set_computer_policy_adaptive:\n" +
+        str(rate_limit_examples.set_computer_policy_adaptive(
+            api, configuration, api_version, api_exception, computer_ids, policy_id))
+    )
     """
 
     # Role examples
@@ -412,6 +437,15 @@ def main():
 
     # Search examples
     """
+    policy_search_cache = search_cache.SearchCache(ttls={"policies": 300})
+    for repeat in range(3):
+        search_examples.search_policies_by_name(
+            api, configuration, api_version, api_exception, name, search_cache=policy_search_cache)
+    print(
+        "Displaying statistics from search_cache.SearchCache.stats:\n" +
+        str(policy_search_cache.stats())
+    )
+
     print(
         "Displaying results from search_examples.search_policies_by_name:\n" +
         str(search_examples.search_policies_by_name(
@@ -430,22 +464,81 @@ def main():
             api, configuration, api_version, api_exception))
     )
 
+    print(
+        "Displaying results from search_examples.paged_search_computers with a checkpoint file:\n" +
+        str(search_examples.paged_search_computers(
+            api, configuration, api_version, api_exception, checkpoint_file="paged_search.checkpoint"))
+    )
+
+    # Give the sweep its own retry budget, so that a failing sweep cannot use up the retries of later examples
+    with retry_middleware.job_budget(100):
+        print(
+            "Displaying results from search_examples.sharded_search_computers:\n" +
+            str(len(list(search_examples.sharded_search_computers(
+                api, configuration, api_version, api_exception, num_shards=8))))
+        )
+
+    async def count_computers_async():
+        count = 0
+        async for computer in search_examples.search_computers_async(
+                api, configuration, api_version, api_exception, prefetch=2):
+            count += 1
+        return count
+
+    print(
+        "Displaying results from search_examples.search_computers_async:\n" +
+        str(asyncio.run(count_computers_async()))
+    )
+
+    print(
+        "Displaying results from search_examples.stream_list_computers:\n" +
+        str(sum(1 for computer in search_examples.stream_list_computers(
+            api, configuration, api_version, api_exception, api.Expand(api.Expand.computer_status))))
+    )
+
     print(
         "Displaying results from search_examples.get_computers_with_policy_and_relay_list:\n" +
         str(search_examples.get_computers_with_policy_and_relay_list(
             api, configuration, api_version, api_exception, relay_list_id, policy_id))
     )
 
+    snapshot = fleet_snapshot.FleetSnapshot.capture(api, configuration, api_version, api_exception,
+                                                    ["ec2_virtual_machine_summary"])
+    computer_index = fleet_snapshot.ComputerIndex(snapshot)
+    print(
+        "Displaying results from search_examples.get_computers_with_policy_and_relay_list with a ComputerIndex:\n" +
+        str(search_examples.get_computers_with_policy_and_relay_list(
+            api, configuration, api_version, api_exception, relay_list_id, policy_id, index=computer_index))
+    )
+
     print(
         "Displaying results from search_examples.search_computers_by_aws_account:\n" +
         str(search_examples.search_computers_by_aws_account(
             api, configuration, api_version, api_exception, "my aws account ID"))
     )
+    computers_by_account, seconds_by_account = search_examples.search_computers_by_aws_accounts(
+        api, configuration, api_version, api_exception, ["my aws account ID", "my other aws account ID"])
+    print(
+        "Displaying results from search_examples.search_computers_by_aws_accounts:\n" +
+        str(computers_by_account) + "\n" + str(seconds_by_account)
+    )
     print(
         "Displaying results from search_examples.search_computers_not_updated:\n" +
         str(search_examples.search_computers_not_updated(
             api, configuration, api_version, api_exception))
     )
+
+    mirror = computer_mirror.ComputerMirror("computers.sqlite")
+    print(
+        "Computers updated by computer_mirror.ComputerMirror.sync:\n" +
+        str(mirror.sync(api, configuration, api_version, api_exception))
+    )
+    print(
+        "Displaying results from search_examples.search_computers_not_updated with a mirror:\n" +
+        str(search_examples.search_computers_not_updated(
+            api, configuration, api_version, api_exception, mirror=mirror))
+    )
+    mirror.close()
     """
 
     # Computer Status examples
@@ -456,18 +549,42 @@ def main():
             api, configuration, api_version, api_exception, computer_id_status_change))
     )
 
+    print(
+        "Displaying results from computer_status_examples.check_anti_malware_for_computers:\n" +
+        str(computer_status_examples.check_anti_malware_for_computers(
+            api, configuration, api_version, api_exception, computer_ids, max_workers=5))
+    )
+
     print(
         "Displaying results from computer_status_examples.find_rules_for_cve:\n" +
         str(computer_status_examples.find_rules_for_cve(
             api, configuration, api_version, api_exception, cve_id))
     )
 
+    cve_rule_index = computer_status_examples.build_cve_rule_index(api, configuration, api_version, api_exception)
+    print(
+        "Displaying results from computer_indexes.CveRuleIndex.rules_for_cves:\n" +
+        str(cve_rule_index.rules_for_cves([cve_id]))
+    )
+
     print(
         "Displaying results from computer_status_examples.check_computers_for_ip_rule:\n" +
         str(computer_status_examples.check_computers_for_ip_rule(
             api, configuration, api_version, api_exception, rule_id))
     )
 
+    print(
+        "Displaying results from computer_status_examples.find_computers_without_ip_rule:\n" +
+        str(computer_status_examples.find_computers_without_ip_rule(
+            api, configuration, api_version, api_exception, rule_id, policy_id))
+    )
+
+    ip_rule_index = computer_status_examples.build_ip_rule_index(api, configuration, api_version, api_exception)
+    print(
+        "Displaying results from computer_indexes.IntrusionPreventionRuleIndex.computers_without_rule:\n" +
+        str(ip_rule_index.computers_without_rule(rule_id))
+    )
+
     print(
         "Displaying results from computer_status_examples.apply_rule_to_policies:\n" +
         str(computer_status_examples.apply_rule_to_policies(
@@ -475,6 +592,13 @@ def main():
                 api, configuration, api_version, api_exception, rule_id), rule_id_2))
     )
 
+    print(
+        "Displaying results from computer_status_examples.apply_rule_to_policies_bulk:\n" +
+        str(computer_status_examples.apply_rule_to_policies_bulk(
+            api, configuration, api_version, api_exception, computer_status_examples.check_computers_for_ip_rule(
+                api, configuration, api_version, api_exception, rule_id), rule_id_2))
+    )
+
     print(
         "Displaying results from computer_status_examples.get_intrusion_prevention_recommendations:\n" +
         str(computer_status_examples.get_intrusion_prevention_recommendations(
@@ -493,11 +617,36 @@ def main():
             api, configuration, api_version, api_exception))
     )
 
+    module_state_rollup = computer_status_examples.get_module_state_rollup(
+        api, configuration, api_version, api_exception)
+    print(
+        "Displaying results from computer_indexes.ModuleStateRollup.counts:\n" +
+        str(module_state_rollup.counts("anti_malware"))
+    )
+
     print(
         "Displaying results from computer_status_examples.get_date_of_last_recommendation_scan:\n" +
         str(computer_status_examples.get_date_of_last_recommendation_scan(
             api, configuration, api_version, api_exception))
     )
+
+    computer_statuses_report = computer_status_examples.get_computer_statuses_columnar(
+        api, configuration, api_version, api_exception)
+    with open("computer_statuses.ndjson", "w", newline="") as ndjson_file:
+        computer_statuses_report.write_ndjson(ndjson_file)
+    print("Rows in computer_status_examples.get_computer_statuses_columnar:\n" + str(len(computer_statuses_report)))
+
+    with open("computer_statuses.csv", "w", newline="") as computer_status_file, \
+            open("anti_malware_statuses.csv", "w", newline="") as anti_malware_file, \
+            open("recommendation_scans.csv", "w", newline="") as recommendation_scan_file:
+        snapshot = computer_status_examples.write_status_report_pack(
+            api, configuration, api_version, api_exception, computer_status_file, anti_malware_file,
+            recommendation_scan_file, max_workers=10)
+    print(
+        "Displaying results from computer_status_examples.get_module_state_rollup with the same snapshot:\n" +
+        str(computer_status_examples.get_module_state_rollup(
+            api, configuration, api_version, api_exception, snapshot).counts("intrusion_prevention"))
+    )
     """
 
     # Common Objects examples
@@ -564,6 +713,11 @@ def main():
         str(tenant_examples.add_policy_to_tenant(
             api, configuration, api_version, api_exception, new_policy, tenant_id))
     )
+
+    print(
+        "Displaying connection reuse from client_registry:\n" +
+        str(client_registry.get_registry(api).stats())
+    )
     """
 
     # First Steps Get example
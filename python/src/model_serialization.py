@@ -0,0 +1,50 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+
+
+def to_data(api_client, model):
+    """ Converts an API model object to JSON-compatible data, using the property names of the Deep Security API.
+
+    :param api_client: An ApiClient object.
+    :param model: The model object, such as a Computer.
+    :return: A dictionary that can be passed to json.dumps.
+    """
+
+    return api_client.sanitize_for_serialization(model)
+
+
+def from_data(api_client, data, response_type):
+    """ Converts JSON-compatible data that uses the property names of the Deep Security API to an API model object.
+
+    :param api_client: An ApiClient object.
+    :param data: A dictionary, such as one returned by to_data or one element of a JSON response.
+    :param response_type: The name of the model class, such as "Computer".
+    :return: The model object.
+    """
+
+    # The generated client converts decoded data in its private __deserialize method, and deserialize only decodes the
+    # response text first, so call it directly to avoid encoding and decoding the data again
+    deserialize_data = getattr(api_client, "_ApiClient__deserialize", None)
+    if deserialize_data is not None:
+        return deserialize_data(data, response_type)
+    return api_client.deserialize(_JsonResponse(json.dumps(data)), response_type)
+
+
+class _JsonResponse(object):
+    # ApiClient.deserialize only reads the data attribute of the response
+    def __init__(self, data):
+        self.data = data
@@ -13,7 +13,10 @@
 # limitations under the License.
 #
 
-def create_policy(api, configuration, api_version, api_exception, policy_name):
+import search_cache as search_cache_module
+
+
+def create_policy(api, configuration, api_version, api_exception, policy_name, search_cache=None):
     """ Creates a policy that inherits from the base policy
 
     :param api: The Deep Security API modules.
@@ -21,6 +24,7 @@ def create_policy(api, configuration, api_version, api_exception, policy_name):
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param policy_name: The name of the policy.
+    :param search_cache: Optional SearchCache that serves repeated searches.
     :return: A PoliciesAPI object for the new policy.
     """
 
@@ -43,19 +47,21 @@ def create_policy(api, configuration, api_version, api_exception, policy_name):
 
     # Search for the Base Policy
     policies_api = api.PoliciesApi(api.ApiClient(configuration))
-    policy_search_results = policies_api.search_policies(api_version, search_filter=search_filter)
+    policy_search_results = search_cache_module.cached_search(search_cache, "policies", policies_api.search_policies,
+                                                              api_version, search_filter)
 
     # Set the parent ID of the new policy to the ID of the Base Policy
     new_policy.parent_id = policy_search_results.policies[0].id
 
     # Add the new policy to Deep Security Manager
     created_policy = policies_api.create_policy(new_policy, api_version)
+    search_cache_module.invalidate(search_cache, "policies")
 
     return created_policy
 
 
 
-def assign_linux_server_policy(api, configuration, api_version, api_exception, computer_id):
+def assign_linux_server_policy(api, configuration, api_version, api_exception, computer_id, search_cache=None):
     """ Assigns a Linux server policy to a computer.
 
     :param api: The Deep Security API modules.
@@ -63,6 +69,7 @@ def assign_linux_server_policy(api, configuration, api_version, api_exception, c
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param computer_id: The ID of the computer to assign the policy to.
+    :param search_cache: Optional SearchCache that serves repeated searches.
     :return: A ComputersApi object that contains the Linux server policy.
     """
 
@@ -79,7 +86,8 @@ def assign_linux_server_policy(api, configuration, api_version, api_exception, c
     computer = api.Computer()
 
     # Perform the search
-    policy_search_results = policies_api.search_policies(api_version, search_filter=search_filter)
+    policy_search_results = search_cache_module.cached_search(search_cache, "policies", policies_api.search_policies,
+                                                              api_version, search_filter)
 
     # Assign the policy to the computer
     computer.policy_id = policy_search_results.policies[0].id
@@ -13,6 +13,9 @@
 # limitations under the License.
 #
 
+import worker_pool
+
+
 def set_computer_policy_check_rate_limit(api, configuration, api_version, api_exception, computer_ids, policy_id):
     """ Sets the policy for a number of computers. On each call to Deep Security Manager, checks whether the API rate limits are exceeded and if so retries the call.
 
@@ -65,4 +68,40 @@ def set_computer_policy_check_rate_limit(api, configuration, api_version, api_ex
                 time.sleep(exp_backoff)
             else:
                 # Return all other exception causes or when max retries is exceeded
-                return e
\ No newline at end of file
+                return e
+
+
+def set_computer_policy_adaptive(api, configuration, api_version, api_exception, computer_ids, policy_id,
+                                 controller=None, max_attempts=12):
+    """ Sets the policy for a number of computers, modifying several computers at the same time.
+
+    The number of concurrent calls grows while the calls succeed, and is halved when Deep Security Manager reports that
+    an API rate limit is exceeded or when calls slow down. Computers whose call exceeded a rate limit are retried.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param computer_ids: A list of IDs of the computers to modify.
+    :param policy_id: The ID of the policy to assign.
+    :param controller: Optional worker_pool.AimdController that adjusts the number of concurrent calls.
+    :param max_attempts: The maximum number of times to try to modify each computer.
+    :return: A dictionary of the modified Computer object for each computer ID, or of the exception that occurred.
+    """
+
+    if controller is None:
+        controller = worker_pool.AimdController()
+
+    computers_api = api.ComputersApi(api.ApiClient(configuration))
+
+    def modify(computer_id):
+        # Create a computer object and set the policy ID
+        computer = api.Computer()
+        computer.policy_id = policy_id
+        return computers_api.modify_computer(computer_id, computer, api_version, overrides=False)
+
+    def is_overload(e):
+        # The error is due to exceeding an API rate limit or an overloaded manager
+        return isinstance(e, api_exception) and e.status in (429, 503)
+
+    return worker_pool.map_adaptive(modify, computer_ids, controller, is_overload, max_attempts)
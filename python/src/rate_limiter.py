@@ -0,0 +1,158 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import threading
+import time
+
+import client_middleware
+
+# The rate limiter runs closest to the HTTP request so that every attempt of a retried call is limited
+MIDDLEWARE_NAME = "rate_limiter"
+MIDDLEWARE_POSITION = 100
+
+ENDPOINT_CLASSES = ("search", "describe", "modify")
+
+
+class TokenBucket(object):
+    """ Allows a number of operations per second, with bursts of up to a number of operations. Thread-safe.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """ Creates a full bucket.
+
+        :param rate: The number of tokens that are added each second.
+        :param capacity: The maximum number of tokens in the bucket. Defaults to one second of tokens, and at least 1.
+        """
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1, timeout=None):
+        """ Takes tokens from the bucket, waiting until they are available.
+
+        Waiting callers reserve their tokens in order, so a burst of callers is spread out at the rate of the bucket.
+
+        :param tokens: The number of tokens to take.
+        :param timeout: The maximum number of seconds to wait. Defaults to no limit.
+        :return: The number of seconds that were waited, or None if the tokens would not be available in time.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = max(0.0, (tokens - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens -= tokens
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class RateLimiter(object):
+    """ Limits the rate of API calls for each class of endpoint: search calls, describe and list calls that only read,
+    and calls that modify.
+    """
+
+    def __init__(self, search=None, describe=None, modify=None, burst_seconds=1.0):
+        """ Creates a rate limiter.
+
+        :param search: The maximum number of search calls per second. None does not limit them.
+        :param describe: The maximum number of describe and list calls per second. None does not limit them.
+        :param modify: The maximum number of create, modify and delete calls per second. None does not limit them.
+        :param burst_seconds: The number of seconds of calls that can be made in a burst after a quiet period.
+        """
+
+        rates = {"search": search, "describe": describe, "modify": modify}
+        self.buckets = {endpoint_class: TokenBucket(rate, max(1.0, rate * burst_seconds))
+                        for endpoint_class, rate in rates.items() if rate is not None}
+        self._waits = {endpoint_class: [0, 0.0] for endpoint_class in ENDPOINT_CLASSES}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def endpoint_class(method, url):
+        """ Classifies an API call.
+
+        :param method: The HTTP method.
+        :param url: The URL of the call.
+        :return: "search", "describe" or "modify".
+        """
+
+        method = method.upper()
+        if method == "POST" and url.split("?")[0].rstrip("/").endswith("/search"):
+            return "search"
+        if method in ("GET", "HEAD"):
+            return "describe"
+        return "modify"
+
+    def acquire(self, method, url):
+        """ Waits until an API call is allowed.
+
+        :param method: The HTTP method.
+        :param url: The URL of the call.
+        :return: The number of seconds that were waited.
+        """
+
+        endpoint_class = self.endpoint_class(method, url)
+        bucket = self.buckets.get(endpoint_class)
+        if bucket is None:
+            return 0.0
+
+        wait = bucket.acquire()
+        with self._lock:
+            self._waits[endpoint_class][0] += 1
+            self._waits[endpoint_class][1] += wait
+        return wait
+
+    def stats(self):
+        """ Reports the limited calls and the time that they waited.
+
+        :return: A dictionary, keyed by endpoint class, of dictionaries with the calls and waited_seconds keys.
+        """
+
+        with self._lock:
+            return {endpoint_class: {"calls": calls, "waited_seconds": waited}
+                    for endpoint_class, (calls, waited) in self._waits.items()}
+
+
+def install(api, limiter):
+    """ Makes every API call of every ApiClient wait for the rate limiter, across all threads.
+
+    :param api: The Deep Security API modules.
+    :param limiter: A RateLimiter object.
+    :return: The rate limiter.
+    """
+
+    def limit(call_next, method, url, *args, **kwargs):
+        limiter.acquire(method, url)
+        return call_next(method, url, *args, **kwargs)
+
+    client_middleware.install(api, MIDDLEWARE_NAME, limit, MIDDLEWARE_POSITION)
+    return limiter
+
+
+def uninstall(api):
+    """ Removes the rate limiter that was installed with install.
+
+    :param api: The Deep Security API modules.
+    """
+
+    client_middleware.uninstall(api, MIDDLEWARE_NAME)
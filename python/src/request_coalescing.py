@@ -0,0 +1,152 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import copy
+import json
+import threading
+
+import client_middleware
+
+# Coalescing runs outside the retry and rate limiter layers, so that one shared call is retried and limited only once
+MIDDLEWARE_NAME = "request_coalescing"
+MIDDLEWARE_POSITION = 300
+
+
+class RequestCoalescer(object):
+    """ Makes identical read requests that are in flight at the same time share one HTTP call.
+
+    Describe, list and search calls whose method, URL, query, headers and body are the same wait for the call that
+    is already in flight and receive its response, or the exception that it raised. Requests are only shared while
+    they are in flight, so a read that starts after another one finishes always makes its own call.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._calls = 0
+        self._coalesced = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_coalescable(method, url, kwargs):
+        """ Checks whether a request only reads and returns a response that can be shared.
+
+        :param method: The HTTP method.
+        :param url: The URL of the request.
+        :param kwargs: The keyword arguments of ApiClient.request.
+        :return: True for GET requests and searches whose response content is read before it is returned.
+        """
+
+        if not kwargs.get("_preload_content", True):
+            return False
+        method = method.upper()
+        return method == "GET" or (method == "POST" and url.split("?")[0].rstrip("/").endswith("/search"))
+
+    @staticmethod
+    def key(method, url, args, kwargs):
+        """ Creates the key that identical requests share.
+
+        :param method: The HTTP method.
+        :param url: The URL of the request.
+        :param args: The other positional arguments of ApiClient.request.
+        :param kwargs: The keyword arguments of ApiClient.request.
+        :return: A string.
+        """
+
+        # The headers include the API key, so requests of different tenants are never shared
+        return json.dumps([method.upper(), url, args, kwargs.get("query_params"), kwargs.get("headers"),
+                           kwargs.get("post_params"), kwargs.get("body")], sort_keys=True, default=repr)
+
+    def request(self, call_next, method, url, *args, **kwargs):
+        """ Makes a request, or waits for an identical request that is in flight.
+
+        :param call_next: The function that makes the request.
+        :param method: The HTTP method.
+        :param url: The URL of the request.
+        :return: The response.
+        """
+
+        if not self.is_coalescable(method, url, kwargs):
+            return call_next(method, url, *args, **kwargs)
+
+        key = self.key(method, url, args, kwargs)
+        with self._lock:
+            self._calls += 1
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self._coalesced += 1
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+
+            # Each caller gets its own response object, because the API client can replace its data when decoding it
+            return copy.copy(flight.response)
+
+        try:
+            flight.response = call_next(method, url, *args, **kwargs)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        """ Reports how many requests were shared.
+
+        :return: A dictionary with the calls key (requests that could be shared) and the coalesced key (requests that
+        waited for another request instead of making a call).
+        """
+
+        with self._lock:
+            return {"calls": self._calls, "coalesced": self._coalesced}
+
+
+class _Flight(object):
+    # The state of a request that is in flight
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def install(api, coalescer=None):
+    """ Coalesces the identical read requests of every ApiClient.
+
+    :param api: The Deep Security API modules.
+    :param coalescer: Optional RequestCoalescer object.
+    :return: The request coalescer.
+    """
+
+    if coalescer is None:
+        coalescer = RequestCoalescer()
+    client_middleware.install(api, MIDDLEWARE_NAME, coalescer.request, MIDDLEWARE_POSITION)
+    return coalescer
+
+
+def uninstall(api):
+    """ Removes the request coalescing that was installed with install.
+
+    :param api: The Deep Security API modules.
+    """
+
+    client_middleware.uninstall(api, MIDDLEWARE_NAME)
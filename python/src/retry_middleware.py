@@ -0,0 +1,245 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import contextlib
+import contextvars
+import datetime
+import email.utils
+import random
+import threading
+import time
+
+import urllib3
+
+import client_middleware
+
+# Retries run outside the rate limiter, so that each attempt waits for the limiter
+MIDDLEWARE_NAME = "retry"
+MIDDLEWARE_POSITION = 200
+
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+# The budget of the job that the current thread or task works for, set by job_budget
+_job_budget = contextvars.ContextVar("retry_job_budget", default=None)
+
+# The installed policy for each ApiClient class
+_policies = {}
+
+
+class RetryBudget(object):
+    """ A number of retries that the calls of a job share, so that a failing manager is not retried indefinitely
+    by many workers. Thread-safe.
+    """
+
+    def __init__(self, max_retries):
+        """ Creates a budget.
+
+        :param max_retries: The total number of retries that are allowed.
+        """
+
+        self.max_retries = max_retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self):
+        """ Uses one retry of the budget.
+
+        :return: True if a retry was available.
+        """
+
+        with self._lock:
+            if self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return self.max_retries - self.used
+
+
+class RetryPolicy(object):
+    """ Decides which failed API calls to retry and how long to wait before each retry.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0, max_retry_after=300.0,
+                 statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS, retry_searches=True, budget=None):
+        """ Creates a policy.
+
+        :param max_attempts: The maximum number of attempts of each call, including the first one.
+        :param base_delay: The maximum number of seconds to wait before the first retry.
+        :param max_delay: The maximum number of seconds to wait before any retry, unless the manager asks for longer.
+        :param max_retry_after: The maximum number of seconds of a Retry-After header that are honored.
+        :param statuses: The HTTP statuses to retry.
+        :param methods: The HTTP methods to retry. By default only idempotent methods are retried.
+        :param retry_searches: Whether to retry searches, which use POST but do not change anything.
+        :param budget: Optional RetryBudget that limits the total number of retries of the calls that are not made
+        inside job_budget. Use job_budget to give each job its own budget, so that one failing job does not use up the
+        retries of other jobs.
+        """
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.retry_searches = retry_searches
+        self.budget = budget
+
+    def is_retryable(self, method, url, e):
+        """ Checks whether a failed call can be retried.
+
+        :param method: The HTTP method of the call.
+        :param url: The URL of the call.
+        :param e: The exception that the call raised.
+        :return: True if the call can be retried.
+        """
+
+        method = method.upper()
+        is_search = method == "POST" and url.split("?")[0].rstrip("/").endswith("/search")
+        if method not in self.methods and not (self.retry_searches and is_search):
+            return False
+
+        if getattr(e, "status", None) in self.statuses:
+            return True
+        return isinstance(e, (urllib3.exceptions.TimeoutError, urllib3.exceptions.MaxRetryError,
+                              urllib3.exceptions.ProtocolError))
+
+    def delay(self, attempt, e):
+        """ Calculates the number of seconds to wait before a retry.
+
+        Uses the Retry-After header of the response when there is one, and otherwise a random delay between zero and
+        an exponentially growing maximum ("full jitter"), so that workers that failed together do not retry together.
+
+        :param attempt: The number of attempts that were made.
+        :param e: The exception that the last attempt raised.
+        :return: The number of seconds.
+        """
+
+        retry_after = parse_retry_after(getattr(e, "headers", None))
+        if retry_after is not None:
+            return min(retry_after, self.max_retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def parse_retry_after(headers):
+    """ Reads the Retry-After header of a response.
+
+    :param headers: The headers of the response, or None.
+    :return: The number of seconds to wait, or None if the header is missing or is not valid.
+    """
+
+    value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    # The header can also be an HTTP date
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_date - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+@contextlib.contextmanager
+def job_budget(max_retries):
+    """ Gives the calls that are made inside a with statement their own retry budget, for example for one sweep.
+
+    The budget is bound to the current context, so jobs that run at the same time on other threads keep their own
+    budgets. The worker threads of worker_pool and of the sweeps in search_examples run in a copy of the context that
+    started them, so they use the budget of their job.
+
+    :param max_retries: The total number of retries that the job is allowed.
+    :return: The RetryBudget object of the job.
+    """
+
+    budget = RetryBudget(max_retries)
+    token = _job_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _job_budget.reset(token)
+
+
+def current_budget(policy):
+    """ Obtains the retry budget that applies to a call made on the current thread.
+
+    :param policy: The RetryPolicy object that install returned.
+    :return: The RetryBudget object of the current job, or the budget of the policy if no job budget is set.
+    """
+
+    budget = _job_budget.get()
+    return budget if budget is not None else policy.budget
+
+
+def installed_policy(api):
+    """ Obtains the policy that install was called with for the API modules.
+
+    :param api: The Deep Security API modules.
+    :return: The RetryPolicy object, or None if the retry middleware is not installed.
+    """
+
+    if MIDDLEWARE_NAME not in client_middleware.installed(api):
+        return None
+    return _policies.get(api.ApiClient)
+
+
+def install(api, policy=None):
+    """ Retries the failed API calls of every ApiClient according to a policy.
+
+    :param api: The Deep Security API modules.
+    :param policy: Optional RetryPolicy object. Defaults to a RetryPolicy with the default settings.
+    :return: The retry policy.
+    """
+
+    if policy is None:
+        policy = RetryPolicy()
+
+    def retry(call_next, method, url, *args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return call_next(method, url, *args, **kwargs)
+            except Exception as e:
+                if attempt >= policy.max_attempts or not policy.is_retryable(method, url, e):
+                    raise
+                budget = current_budget(policy)
+                if budget is not None and not budget.try_spend():
+                    raise
+                time.sleep(policy.delay(attempt, e))
+                attempt += 1
+
+    client_middleware.install(api, MIDDLEWARE_NAME, retry, MIDDLEWARE_POSITION)
+    _policies[api.ApiClient] = policy
+    return policy
+
+
+def uninstall(api):
+    """ Removes the retries that were installed with install.
+
+    :param api: The Deep Security API modules.
+    """
+
+    client_middleware.uninstall(api, MIDDLEWARE_NAME)
+    _policies.pop(api.ApiClient, None)
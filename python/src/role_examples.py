@@ -13,7 +13,10 @@
 # limitations under the License.
 #
 
-def search_roles_by_name(api, configuration, api_version, api_exception, role_name):
+import search_cache as search_cache_module
+
+
+def search_roles_by_name(api, configuration, api_version, api_exception, role_name, search_cache=None):
     """ Searches for a role by name and returns the ID.
 
     :param api: The Deep Security API modules.
@@ -21,6 +24,7 @@ def search_roles_by_name(api, configuration, api_version, api_exception, role_na
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param role_name: The role name to search.
+    :param search_cache: Optional SearchCache that serves repeated searches.
     :return: The ID of the found role, or None if no role is found.
     """
 
@@ -40,7 +44,8 @@ def search_roles_by_name(api, configuration, api_version, api_exception, role_na
     # Perform the search and obtain the ID of the returned role
     # Perform the search
     admin_roles_api = api.AdministratorRolesApi(api.ApiClient(configuration))
-    roles = admin_roles_api.search_administrator_roles(api_version, search_filter=role_filter)
+    roles = search_cache_module.cached_search(search_cache, "roles", admin_roles_api.search_administrator_roles,
+                                              api_version, role_filter)
 
     if len(roles.roles) > 0:
         role_id = roles.roles[0].id
@@ -48,13 +53,14 @@ def search_roles_by_name(api, configuration, api_version, api_exception, role_na
     return role_id
 
 
-def create_role_for_computer_reports(api, configuration, api_version, api_exception):
+def create_role_for_computer_reports(api, configuration, api_version, api_exception, search_cache=None):
     """ Creates a role with rights that are appropriate for reading computer properties and assigning policies to computers.
 
     :param api: The Deep Security API modules.
     :param configuration: Configuration object to pass to the api client.
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
+    :param search_cache: Optional SearchCache whose role searches are invalidated when the role is created.
     :return: The ID of the new role.
     """
 
@@ -82,5 +88,6 @@ def create_role_for_computer_reports(api, configuration, api_version, api_except
     # Perform the search
     admin_roles_api = api.AdministratorRolesApi(api.ApiClient(configuration))
     new_role = admin_roles_api.create_administrator_role(run_reports_role, api_version)
+    search_cache_module.invalidate(search_cache, "roles")
 
     return new_role.id
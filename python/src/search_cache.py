@@ -0,0 +1,138 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import hashlib
+import json
+
+import caching
+
+
+class SearchCache(object):
+    """ Caches the results of search calls, keyed by the host and API key, the search method, the search filter, and the
+    expand list.
+
+    Search filters are serialized to JSON with sorted keys and sorted search criteria, so equal filters share an entry
+    however they were built. The key includes a digest of the API key, so the results of different tenants that use the
+    same Configuration object are not shared.
+    Each resource, such as "policies", can have its own time to live, and all entries of a resource are invalidated
+    when the resource is modified. The cached results are shared by all callers and must not be modified.
+    """
+
+    def __init__(self, ttls=None, default_ttl=60, max_size=1000):
+        """ Creates an empty cache.
+
+        :param ttls: Optional dictionary of resource names with the number of seconds that their results are cached.
+        :param default_ttl: The number of seconds that results are cached for resources that are not in ttls.
+        :param max_size: The maximum number of search results to keep.
+        """
+
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self._cache = caching.TtlLruCache(max_size=max_size, ttl=default_ttl)
+
+    def search(self, resource, search_method, api_version, search_filter=None, expand=None, **kwargs):
+        """ Calls a search method, or returns the result of an identical call that is still cached.
+
+        :param resource: The name of the searched resource, such as "policies", used for ttls and invalidation.
+        :param search_method: A search method of an API object, such as policies_api.search_policies.
+        :param api_version: The version of the API to use.
+        :param search_filter: The SearchFilter to pass to the method.
+        :param expand: The expand list to pass to the method, if the method accepts one.
+        :param kwargs: Other keyword arguments to pass to the method, such as overrides.
+        :return: The result of the search method.
+        """
+
+        key = self.key(resource, search_method, search_filter, expand, kwargs)
+        if expand is not None:
+            kwargs["expand"] = expand
+
+        return self._cache.get_or_load(
+            key,
+            lambda: search_method(api_version, search_filter=search_filter, **kwargs),
+            self.ttls.get(resource, self.default_ttl))
+
+    def invalidate(self, resource=None):
+        """ Removes the cached results of a resource, for example after the resource was created or modified.
+
+        :param resource: The name of the resource. If None, all results are removed.
+        """
+
+        if resource is None:
+            self._cache.invalidate()
+        else:
+            self._cache.invalidate(match=lambda key: key[0] == resource)
+
+    def stats(self):
+        """ Obtains the hit and miss counts of the cache.
+
+        :return: A dictionary with the number of hits, misses, and entries, and the hit ratio.
+        """
+
+        return self._cache.stats()
+
+    @staticmethod
+    def key(resource, search_method, search_filter, expand, kwargs):
+        """ Creates the canonical cache key of a search call.
+
+        :return: A tuple of the resource, the host, a digest of the API key, the endpoint, the serialized filter, the
+        sorted expand list, and the serialized other arguments.
+        """
+
+        api_client = search_method.__self__.api_client
+        configuration = api_client.configuration
+        credentials = json.dumps(configuration.api_key, sort_keys=True, default=repr)
+        credentials_digest = hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+
+        # Search criteria are combined with AND, so their order does not change the results
+        filter_data = api_client.sanitize_for_serialization(search_filter)
+        if isinstance(filter_data, dict) and filter_data.get("searchCriteria"):
+            filter_data["searchCriteria"] = sorted(filter_data["searchCriteria"],
+                                                   key=lambda criteria: json.dumps(criteria, sort_keys=True))
+        serialized_filter = json.dumps(filter_data, sort_keys=True)
+
+        return (resource, configuration.host, credentials_digest, search_method.__name__, serialized_filter,
+                tuple(sorted(expand or ())), json.dumps(kwargs, sort_keys=True, default=repr))
+
+
+def cached_search(cache, resource, search_method, api_version, search_filter=None, expand=None, **kwargs):
+    """ Calls a search method through a SearchCache, or directly when there is no cache.
+
+    :param cache: A SearchCache object, or None.
+    :param resource: The name of the searched resource, such as "policies".
+    :param search_method: A search method of an API object, such as policies_api.search_policies.
+    :param api_version: The version of the API to use.
+    :param search_filter: The SearchFilter to pass to the method.
+    :param expand: The expand list to pass to the method, if the method accepts one.
+    :param kwargs: Other keyword arguments to pass to the method.
+    :return: The result of the search method.
+    """
+
+    if cache is not None:
+        return cache.search(resource, search_method, api_version, search_filter, expand, **kwargs)
+
+    if expand is not None:
+        kwargs["expand"] = expand
+    return search_method(api_version, search_filter=search_filter, **kwargs)
+
+
+def invalidate(cache, resource):
+    """ Invalidates a resource in a SearchCache, if there is one.
+
+    :param cache: A SearchCache object, or None.
+    :param resource: The name of the resource that was modified.
+    """
+
+    if cache is not None:
+        cache.invalidate(resource)
@@ -13,10 +13,27 @@
 # limitations under the License.
 #
 
+import asyncio
+import concurrent.futures
+import contextvars
+import queue
+import threading
 import time
 
+import urllib3
 
-def search_policies_by_name(api, configuration, api_version, api_exception, name):
+import model_serialization
+import retry_middleware
+import search_cache as search_cache_module
+import streaming_json
+import sweep_checkpoint
+import worker_pool
+
+# The default number of objects to retrieve with each call when paging through search results
+DEFAULT_PAGE_SIZE = 500
+
+
+def search_policies_by_name(api, configuration, api_version, api_exception, name, search_cache=None):
     """ Searches for a policy by name.
 
     :param api: The Deep Security API modules.
@@ -24,6 +41,7 @@ def search_policies_by_name(api, configuration, api_version, api_exception, name
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param name: The policy name to search for.
+    :param search_cache: Optional SearchCache that serves repeated searches.
     :return: A Policies object that contains the policies found by the search.
     """
 
@@ -39,7 +57,8 @@ def search_policies_by_name(api, configuration, api_version, api_exception, name
 
     # Perform the search
     policies_api = api.PoliciesApi(api.ApiClient(configuration))
-    return policies_api.search_policies(api_version, search_filter=search_filter)
+    return search_cache_module.cached_search(search_cache, "policies", policies_api.search_policies, api_version,
+                                             search_filter)
 
 
 def search_updated_intrusion_prevention_rules(api, configuration, api_version, api_exception, num_days):
@@ -74,57 +93,600 @@ def search_updated_intrusion_prevention_rules(api, configuration, api_version, a
 
 
 
-def paged_search_computers(api, configuration, api_version, api_exception):
+def paged_search_computers(api, configuration, api_version, api_exception, page_size=None, checkpoint_file=None):
     """ Uses a search filter to create a paged list of computers
 
     :param api: The Deep Security API modules.
     :param configuration: Configuration object to pass to the api client.
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
+    :param page_size: The number of computers on each page, or an AdaptivePageSize object. By default the page size
+    adapts to the response time of Deep Security Manager.
+    :param checkpoint_file: Optional path of a file that saves the progress of the search after each page. If the
+    search stops, calling this function again with the same file resumes after the last saved page. The file is
+    deleted when the search is complete.
     :return: A list of computer objects
     """
 
-    # Set search criteria
+    # Include the minimum information in the returned Computer objects
+    expand = api.Expand(api.Expand.none)
+
+    if page_size is None:
+        page_size = AdaptivePageSize()
+
+    # Perform the search and do work on the results
+    paged_computers = []
+    last_id = 0
+
+    # Restore the pages that were saved before the search stopped
+    checkpoint = None
+    if checkpoint_file is not None:
+        checkpoint = sweep_checkpoint.SweepCheckpoint(checkpoint_file)
+        api_client = api.ApiClient(configuration)
+        for page in checkpoint.results("computers"):
+            paged_computers.append([model_serialization.from_data(api_client, computer, "Computer")
+                                    for computer in page])
+        last_id = checkpoint.cursor("computers", 0)
+
+    for computers in iter_computer_pages(api, configuration, api_version, api_exception, expand, page_size=page_size,
+                                         last_id=last_id):
+        paged_computers.append(computers)
+
+        # Get the ID of the last computer in the page and return it with the number of computers on the page
+        last_id = computers[-1].id
+        print("Last ID: " + str(last_id), "Computers found: " + str(len(computers)))
+
+        if checkpoint is not None:
+            page = [model_serialization.to_data(api_client, computer) for computer in computers]
+            checkpoint.commit("computers", last_id, [page])
+
+    print("No computers found.")
+    if checkpoint is not None:
+        checkpoint.finish()
+    if isinstance(page_size, AdaptivePageSize):
+        print("Final page size: " + str(page_size.page_size),
+              "Computers per second: " + str(round(page_size.rows_per_second, 1)))
+    return paged_computers
+
+
+def iter_computers(api, configuration, api_version, api_exception, expand=None, search_criteria=None,
+                   page_size=DEFAULT_PAGE_SIZE):
+    """ Generates computers one at a time, retrieving them from Deep Security Manager one page at a time.
+
+    Use this generator instead of list_computers to process a large number of computers: memory use and the time until
+    the first computer is available depend on the page size, not on the number of computers.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param expand: An Expand object that defines the information to include in the computers. Defaults to none.
+    :param search_criteria: Optional list of SearchCriteria objects that the computers must match.
+    :param page_size: The maximum number of computers to retrieve with each call.
+    :return: A generator of Computer objects, in order of ID.
+    """
+
+    for computers in iter_computer_pages(api, configuration, api_version, api_exception, expand, search_criteria,
+                                         page_size):
+        for computer in computers:
+            yield computer
+
+
+def stream_list_computers(api, configuration, api_version, api_exception, expand=None,
+                          chunk_size=streaming_json.DEFAULT_CHUNK_SIZE):
+    """ Lists all computers, decoding each computer as its part of the response arrives.
+
+    The response of list_computers is one JSON document. Instead of decoding all of it before returning, the
+    computers are decoded and generated one at a time, so memory use depends on the size of one computer.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param expand: An Expand object that defines the information to include in the computers. Defaults to none.
+    :param chunk_size: The number of bytes to read from the connection at a time.
+    :return: A generator of Computer objects.
+    """
+
+    if expand is None:
+        expand = api.Expand(api.Expand.none)
+
+    # Return the undecoded response so that it can be read incrementally
+    api_client = api.ApiClient(configuration)
+    computers_api = api.ComputersApi(api_client)
+    response = computers_api.list_computers(api_version, expand=expand.list(), overrides=False,
+                                            _preload_content=False)
+
+    return streaming_json.iter_response_models(api_client, response, "computers", "Computer", chunk_size)
+
+
+def iter_computer_pages(api, configuration, api_version, api_exception, expand=None, search_criteria=None,
+                        page_size=DEFAULT_PAGE_SIZE, last_id=0):
+    """ Generates pages of computers by searching for computers with an ID greater than the last ID of the previous page.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param expand: An Expand object that defines the information to include in the computers. Defaults to none.
+    :param search_criteria: Optional list of SearchCriteria objects that the computers must match.
+    :param page_size: The maximum number of computers to retrieve with each call, or an AdaptivePageSize object.
+    :param last_id: Only computers with an ID greater than this value are retrieved.
+    :return: A generator of lists of Computer objects, in order of ID.
+    """
+
+    # Include the minimum information in the returned Computer objects by default
+    if expand is None:
+        expand = api.Expand(api.Expand.none)
+
+    computers_api = api.ComputersApi(api.ApiClient(configuration))
+
+    def search(search_filter):
+        computers = computers_api.search_computers(api_version, search_filter=search_filter, expand=expand.list(),
+                                                   overrides=False)
+        return computers.computers
+
+    def response_length():
+        # The generated client keeps the response of its most recent call, whose data it may have decoded to text
+        last_response = getattr(computers_api.api_client, "last_response", None)
+        return len(getattr(last_response, "data", None) or b"") or None
+
+    return iter_id_pages(api, search, search_criteria, page_size, last_id, response_length)
+
+
+async def search_computers_async(api, configuration, api_version, api_exception, search_criteria=None, expand=None,
+                                 page_size=DEFAULT_PAGE_SIZE, prefetch=1):
+    """ Generates computers asynchronously, retrieving the next pages while the caller processes the current page.
+
+    Use with async for: async for computer in search_computers_async(api, configuration, api_version, api_exception)
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param search_criteria: Optional list of SearchCriteria objects that the computers must match.
+    :param expand: An Expand object that defines the information to include in the computers. Defaults to none.
+    :param page_size: The maximum number of computers to retrieve with each call.
+    :param prefetch: The maximum number of pages to retrieve ahead of the page that the caller is processing.
+    :return: An asynchronous generator of Computer objects, in order of ID.
+    """
+
+    pages = iter_computer_pages(api, configuration, api_version, api_exception, expand, search_criteria, page_size)
+    async for computers in prefetch_pages_async(pages, prefetch):
+        for computer in computers:
+            yield computer
+
+
+async def search_intrusion_prevention_rules_async(api, configuration, api_version, api_exception, search_criteria=None,
+                                                  page_size=DEFAULT_PAGE_SIZE, prefetch=1):
+    """ Generates Intrusion Prevention rules asynchronously, retrieving the next pages while the caller processes the
+    current page.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param search_criteria: Optional list of SearchCriteria objects that the rules must match.
+    :param page_size: The maximum number of rules to retrieve with each call.
+    :param prefetch: The maximum number of pages to retrieve ahead of the page that the caller is processing.
+    :return: An asynchronous generator of IntrusionPreventionRule objects, in order of ID.
+    """
+
+    intrusion_prevention_rules_api = api.IntrusionPreventionRulesApi(api.ApiClient(configuration))
+
+    def search(search_filter):
+        rules = intrusion_prevention_rules_api.search_intrusion_prevention_rules(api_version,
+                                                                                search_filter=search_filter)
+        return rules.intrusion_prevention_rules
+
+    pages = iter_id_pages(api, search, search_criteria, page_size)
+    async for rules in prefetch_pages_async(pages, prefetch):
+        for rule in rules:
+            yield rule
+
+
+async def prefetch_pages_async(pages, prefetch=1):
+    """ Retrieves pages from a synchronous page generator on a worker thread, ahead of the asynchronous caller.
+
+    :param pages: A generator of pages, such as the one returned by iter_computer_pages.
+    :param prefetch: The maximum number of pages to retrieve ahead of the page that the caller is processing. With 0,
+    each page is retrieved only when the caller asks for it.
+    :return: An asynchronous generator of the pages.
+    """
+
+    loop = asyncio.get_running_loop()
+    page_queue = asyncio.Queue()
+    end_of_pages = object()
+
+    # Each page is retrieved with a permit. The caller adds a permit when it asks for a page, so at most prefetch pages
+    # are retrieved or being retrieved beyond the pages that the caller asked for
+    permits = asyncio.Semaphore(prefetch)
+
+    # A single worker thread advances the page generator, so pages are retrieved one after the other
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    context = contextvars.copy_context()
+
+    async def produce():
+        try:
+            while True:
+                await permits.acquire()
+                page = await loop.run_in_executor(executor, context.run, next, pages, end_of_pages)
+                await page_queue.put(page)
+                if page is end_of_pages:
+                    return
+        except Exception as e:
+            await page_queue.put(e)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            permits.release()
+            page = await page_queue.get()
+            if page is end_of_pages:
+                break
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        # Do not block the event loop while a page that is no longer needed is being retrieved
+        producer.cancel()
+        executor.shutdown(wait=False)
+
+
+def sharded_search_computers(api, configuration, api_version, api_exception, num_shards=4, expand=None,
+                             search_criteria=None, page_size=DEFAULT_PAGE_SIZE, checkpoint_file=None,
+                             buffered_pages=2):
+    """ Generates computers in order of ID, paging through disjoint ranges of IDs concurrently.
+
+    The range of computer IDs is split into num_shards intervals after probing for the largest ID. Each interval is
+    bounded by a greater-than and a less-than-or-equal ID criteria and is paged on its own thread, so the time to sweep
+    all computers depends on the number of shards instead of on the total number of pages. Each shard retrieves at most
+    buffered_pages pages ahead of the computers that were generated, so memory use stays bounded.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param num_shards: The number of ID intervals to page concurrently.
+    :param expand: An Expand object that defines the information to include in the computers. Defaults to none.
+    :param search_criteria: Optional list of SearchCriteria objects that the computers must match.
+    :param page_size: The maximum number of computers to retrieve with each call.
+    :param checkpoint_file: Optional path of a file that saves the shard boundaries and the progress of each shard after
+    each page. If the sweep stops, calling this function again with the same file generates the saved computers and
+    then resumes each shard after its last saved page. The file is deleted when the sweep is complete.
+    :param buffered_pages: The number of pages that each shard can retrieve before its computers are generated.
+    :return: A generator of Computer objects, in order of ID.
+    """
+
+    checkpoint = None
+    boundaries = None
+    if checkpoint_file is not None:
+        checkpoint = sweep_checkpoint.SweepCheckpoint(checkpoint_file)
+        boundaries = [tuple(interval) for interval in checkpoint.get("shard_boundaries", [])] or None
+
+    if boundaries is None:
+        max_id = probe_max_computer_id(api, configuration, api_version, api_exception, num_shards)
+        if max_id == 0:
+            return
+
+        boundaries = shard_boundaries(max_id, num_shards)
+        if checkpoint is not None:
+            checkpoint.set("shard_boundaries", boundaries)
+
+    api_client = api.ApiClient(configuration)
+    shard_queues = [queue.Queue(maxsize=buffered_pages) for _ in boundaries]
+    stopped = threading.Event()
+
+    def put(shard, item):
+        # Wait for the consumer to take a page, unless the sweep was stopped
+        while not stopped.is_set():
+            try:
+                shard_queues[shard].put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def sweep_shard(shard):
+        first_id, last_id = boundaries[shard]
+        cursor_name = "shard:" + str(shard)
+        try:
+            if checkpoint is not None:
+                # Restore the pages that were saved before the sweep stopped
+                for page in checkpoint.results(cursor_name):
+                    if not put(shard, [model_serialization.from_data(api_client, computer, "Computer")
+                                       for computer in page]):
+                        return
+                first_id = checkpoint.cursor(cursor_name, first_id)
+
+            shard_criteria = list(search_criteria or [])
+            if last_id is not None:
+                # Set search criteria for the upper bound of the interval
+                upper_criteria = api.SearchCriteria()
+                upper_criteria.id_value = last_id
+                upper_criteria.id_test = "less-than-or-equal"
+                shard_criteria.append(upper_criteria)
+
+            for computers in iter_computer_pages(api, configuration, api_version, api_exception, expand,
+                                                 shard_criteria, page_size, first_id):
+                if checkpoint is not None:
+                    page = [model_serialization.to_data(api_client, computer) for computer in computers]
+                    checkpoint.commit(cursor_name, computers[-1].id, [page])
+                if not put(shard, computers):
+                    return
+            put(shard, None)
+        except Exception as e:
+            put(shard, e)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(boundaries)) as executor:
+        for shard in range(len(boundaries)):
+            executor.submit(contextvars.copy_context().run, sweep_shard, shard)
+
+        try:
+            # Merge the shards in order of ID, which is the order of the shards
+            for shard_queue in shard_queues:
+                while True:
+                    computers = shard_queue.get()
+                    if computers is None:
+                        break
+                    if isinstance(computers, Exception):
+                        raise computers
+                    for computer in computers:
+                        yield computer
+
+            if checkpoint is not None:
+                checkpoint.finish()
+        finally:
+            stopped.set()
+
+
+def probe_max_computer_id(api, configuration, api_version, api_exception, num_shards=1):
+    """ Finds the largest computer ID, to the precision that is needed to split the IDs into shards.
+
+    The probe doubles an ID until no computer has a larger ID and then narrows the range with a binary search. Each
+    step is a search that returns at most one computer.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param num_shards: The number of shards that the IDs are split into. The result is accurate to within
+    1/16 of a shard.
+    :return: An ID that is not less than the largest computer ID, or 0 if there are no computers.
+    """
+
+    # Set search criteria for the probed ID
     search_criteria = api.SearchCriteria()
-    search_criteria.id_value = 0
     search_criteria.id_test = "greater-than"
 
-    # Create a search filter with maximum returned items
-    page_size = 10
+    # Create a search filter that returns at most one computer
     search_filter = api.SearchFilter()
-    search_filter.max_items = page_size
+    search_filter.max_items = 1
     search_filter.search_criteria = [search_criteria]
 
     # Include the minimum information in the returned Computer objects
     expand = api.Expand(api.Expand.none)
 
-    # Perform the search and do work on the results
     computers_api = api.ComputersApi(api.ApiClient(configuration))
-    paged_computers = []
+
+    def has_computer_after(computer_id):
+        search_criteria.id_value = computer_id
+        computers = computers_api.search_computers(api_version, search_filter=search_filter, expand=expand.list(),
+                                                   overrides=False)
+        return len(computers.computers) > 0
+
+    if not has_computer_after(0):
+        return 0
+
+    # Find an ID that is larger than every computer ID
+    lower, upper = 0, 1024
+    while has_computer_after(upper):
+        lower, upper = upper, upper * 2
+
+    # Narrow the range until it is small compared to the size of a shard
+    precision = max(1, upper // (num_shards * 16))
+    while upper - lower > precision:
+        middle = (lower + upper) // 2
+        if has_computer_after(middle):
+            lower = middle
+        else:
+            upper = middle
+
+    return upper
+
+
+def shard_boundaries(max_id, num_shards):
+    """ Splits the IDs from 1 to max_id into intervals of equal size.
+
+    :param max_id: The largest ID.
+    :param num_shards: The number of intervals.
+    :return: A list of (greater-than ID, less-than-or-equal ID) tuples. The upper bound of the last interval is None
+    so that it includes IDs that were added after max_id was found.
+    """
+
+    num_shards = max(1, min(num_shards, max_id))
+    bounds = [max_id * shard // num_shards for shard in range(num_shards + 1)]
+    intervals = list(zip(bounds[:-1], bounds[1:]))
+    intervals[-1] = (intervals[-1][0], None)
+    return intervals
+
+
+def iter_intrusion_prevention_rules(api, configuration, api_version, api_exception, search_criteria=None,
+                                    page_size=DEFAULT_PAGE_SIZE):
+    """ Generates Intrusion Prevention rules one at a time, retrieving them from Deep Security Manager one page at a time.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param search_criteria: Optional list of SearchCriteria objects that the rules must match.
+    :param page_size: The maximum number of rules to retrieve with each call.
+    :return: A generator of IntrusionPreventionRule objects, in order of ID.
+    """
+
+    intrusion_prevention_rules_api = api.IntrusionPreventionRulesApi(api.ApiClient(configuration))
+
+    def search(search_filter):
+        rules = intrusion_prevention_rules_api.search_intrusion_prevention_rules(api_version,
+                                                                                search_filter=search_filter)
+        return rules.intrusion_prevention_rules
+
+    for rules in iter_id_pages(api, search, search_criteria, page_size):
+        for rule in rules:
+            yield rule
+
+
+def iter_id_pages(api, search, search_criteria=None, page_size=DEFAULT_PAGE_SIZE, last_id=0, response_length=None):
+    """ Generates pages of search results by using the ID of the last result of each page as the cursor for the next page.
+
+    :param api: The Deep Security API modules.
+    :param search: A function that receives a SearchFilter and returns the list of objects that were found.
+    :param search_criteria: Optional list of SearchCriteria objects that the objects must match.
+    :param page_size: The maximum number of objects to retrieve with each call, or an AdaptivePageSize object that
+    chooses the number for each call and retries pages that fail because Deep Security Manager is overloaded.
+    :param last_id: Only objects with an ID greater than this value are retrieved.
+    :param response_length: Optional function that returns the length of the body of the most recent response, in
+    characters once the API client has decoded it to text.
+    :return: A generator of lists of objects, in order of ID.
+    """
+
+    # Set search criteria for the ID cursor
+    id_criteria = api.SearchCriteria()
+    id_criteria.id_value = last_id
+    id_criteria.id_test = "greater-than"
+
+    # Create a search filter with maximum returned items
+    search_filter = api.SearchFilter()
+    search_filter.max_items = page_size
+    search_filter.search_criteria = [id_criteria] + list(search_criteria or [])
+    search_filter.sort_by_object_id = True
+
+    adaptive = page_size if isinstance(page_size, AdaptivePageSize) else None
+    retry_policy = retry_middleware.installed_policy(api)
 
     while True:
-        computers = computers_api.search_computers(api_version, search_filter=search_filter, expand=expand.list(), overrides=False)
-        num_found = len(computers.computers)
-        current_paged_computers = []
+        if adaptive is None:
+            results = search(search_filter)
+        else:
+            results = _search_adaptive_page(search, search_filter, adaptive, response_length, retry_policy)
 
-        if num_found == 0:
-            print("No computers found.")
-            break
+        if not results:
+            return
 
-        for computer in computers.computers:
-            current_paged_computers.append(computer)
+        yield results
 
-        paged_computers.append(current_paged_computers)
+        # Continue after the ID of the last object in the page
+        id_criteria.id_value = results[-1].id
 
-        # Get the ID of the last computer in the page and return it with the number of computers on the page
-        last_id = computers.computers[-1].id
-        search_criteria.id_value = last_id
-        print("Last ID: " + str(last_id), "Computers found: " + str(num_found))
 
-    return paged_computers
+class AdaptivePageSize(object):
+    """ Chooses the number of items to retrieve with each call of a paged search.
 
+    The page size grows while full pages are returned faster than the target time and smaller than the target size,
+    and shrinks when a page is slow or large, or when Deep Security Manager responds with 429, 502, 503, or 504, or
+    does not respond in time.
+    """
 
-def get_computers_with_policy_and_relay_list(api, configuration, api_version, api_exception, relay_list_id, policy_id):
+    def __init__(self, initial=100, minimum=10, maximum=5000, target_seconds=2.0, max_response_length=8 * 1024 * 1024,
+                 max_retries=5):
+        """ Creates a page size controller.
+
+        :param initial: The page size of the first call.
+        :param minimum: The smallest page size.
+        :param maximum: The largest page size.
+        :param target_seconds: The longest time that a call should take.
+        :param max_response_length: The longest response body that a call should return, in characters, when the
+        length is known.
+        :param max_retries: The number of times to retry a page that fails because of overload.
+        """
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.max_response_length = max_response_length
+        self.max_retries = max_retries
+        self.page_size = max(minimum, min(maximum, initial))
+        self.total_rows = 0
+        self.total_seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        """ The number of items that were retrieved per second of waiting for Deep Security Manager.
+        """
+
+        return self.total_rows / self.total_seconds if self.total_seconds else 0.0
+
+    def record(self, num_rows, seconds, response_length=None):
+        """ Adjusts the page size after a successful call.
+
+        :param num_rows: The number of items that the call returned.
+        :param seconds: The time that the call took.
+        :param response_length: The length of the response body in characters, if known.
+        """
+
+        self.total_rows += num_rows
+        self.total_seconds += seconds
+
+        too_large = (self.max_response_length is not None and response_length is not None and
+                     response_length > self.max_response_length)
+        if seconds > self.target_seconds or too_large:
+            self.shrink()
+        elif num_rows >= self.page_size and seconds < self.target_seconds / 2 and (
+                self.max_response_length is None or response_length is None or
+                response_length < self.max_response_length / 2):
+            # Only full pages show that a larger page would have been filled
+            self.page_size = min(self.maximum, self.page_size * 2)
+
+    def shrink(self):
+        """ Halves the page size, for example after a slow response or a call that failed because of overload.
+        """
+
+        self.page_size = max(self.minimum, self.page_size // 2)
+
+
+def _search_adaptive_page(search, search_filter, adaptive, response_length, retry_policy=None):
+    retries = 0
+    while True:
+        page_size = adaptive.page_size
+        search_filter.max_items = page_size
+        start = time.monotonic()
+        try:
+            results = search(search_filter)
+        except Exception as e:
+            if not _is_overload_error(e, retry_policy.statuses if retry_policy is not None else retry_middleware.RETRY_STATUSES):
+                raise
+            adaptive.shrink()
+            if retries >= adaptive.max_retries:
+                raise
+
+            if retry_policy is not None:
+                # The retry middleware already retried the call at this page size, so only retry at a smaller size,
+                # and charge the retry to the budget of the job
+                if adaptive.page_size == page_size:
+                    raise
+                budget = retry_middleware.current_budget(retry_policy)
+                if budget is not None and not budget.try_spend():
+                    raise
+            retries += 1
+            time.sleep((retry_policy or _ADAPTIVE_RETRY_POLICY).delay(retries, e))
+            continue
+
+        adaptive.record(len(results or ()), time.monotonic() - start, response_length() if response_length else None)
+        return results
+
+
+# Waits between retries of a page when the retry middleware is not installed
+_ADAPTIVE_RETRY_POLICY = retry_middleware.RetryPolicy(base_delay=0.2)
+
+
+def _is_overload_error(e, statuses):
+    if getattr(e, "status", None) in statuses:
+        return True
+    return isinstance(e, (urllib3.exceptions.TimeoutError, urllib3.exceptions.MaxRetryError))
+
+
+def get_computers_with_policy_and_relay_list(api, configuration, api_version, api_exception, relay_list_id, policy_id,
+                                             index=None):
     """ Search for computers that are assigned to a specific policy and relay list.
 
     :param api: The Deep Security API modules.
@@ -133,9 +695,13 @@ def get_computers_with_policy_and_relay_list(api, configuration, api_version, ap
     :param api_exception: The Deep Security API exception module.
     :param relay_list_id: The ID of the relay list.
     :param policy_id: The ID of the policy.
+    :param index: Optional fleet_snapshot.ComputerIndex to look the computers up in instead of Deep Security Manager.
     :return: A Computers object that contains matching computers
     """
 
+    if index is not None:
+        return api.Computers(computers=index.find(policy_id=policy_id, relay_list_id=relay_list_id))
+
     # Set search criteria for platform
     policy_criteria = api.SearchCriteria()
     policy_criteria.field_name = "policyID"
@@ -159,7 +725,7 @@ def get_computers_with_policy_and_relay_list(api, configuration, api_version, ap
     return computers_api.search_computers(api_version, search_filter=search_filter, expand=expand.list(), overrides=False)
 
 
-def search_computers_by_aws_account(api, configuration, api_version, api_exception, account_id):
+def search_computers_by_aws_account(api, configuration, api_version, api_exception, account_id, mirror=None):
     """ Search for protected EC2 instances that belong to a specific AWS account.
 
     :param api: The Deep Security API modules.
@@ -167,9 +733,13 @@ def search_computers_by_aws_account(api, configuration, api_version, api_excepti
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
     :param account_id: The ID of the AWS account.
+    :param mirror: Optional ComputerMirror to read the computers from instead of Deep Security Manager.
     :return: A Computers object that contains matching computers
     """
 
+    if mirror is not None:
+        return api.Computers(computers=mirror.search_computers_by_aws_account(api, configuration, account_id))
+
     # Search criteria
     computer_criteria = api.SearchCriteria()
     computer_criteria.field_name = "ec2VirtualMachineSummary/accountID"
@@ -188,7 +758,49 @@ def search_computers_by_aws_account(api, configuration, api_version, api_excepti
     return computers_api.search_computers(api_version, search_filter=search_filter, expand=expand.list(), overrides=False)
 
 
-def search_computers_not_updated(api, configuration, api_version, api_exception):
+def search_computers_by_aws_accounts(api, configuration, api_version, api_exception, account_ids, max_workers=8,
+                                     page_size=DEFAULT_PAGE_SIZE):
+    """ Search for protected EC2 instances that belong to any of several AWS accounts.
+
+    The accounts are searched concurrently, and the computers of each account are retrieved one page at a time.
+
+    :param api: The Deep Security API modules.
+    :param configuration: Configuration object to pass to the api client.
+    :param api_version: The version of the API to use.
+    :param api_exception: The Deep Security API exception module.
+    :param account_ids: The IDs of the AWS accounts.
+    :param max_workers: The maximum number of accounts to search at the same time.
+    :param page_size: The maximum number of computers to retrieve with each call.
+    :return: A tuple of a dictionary of the list of computers of each account ID, and a dictionary of the number of
+    seconds that the search of each account ID took.
+    """
+
+    # Include only the EC2 virtual machine summary in the returned computers
+    expand = api.Expand(api.Expand.ec2_virtual_machine_summary)
+
+    def search_account(account_id):
+        # Search criteria
+        computer_criteria = api.SearchCriteria()
+        computer_criteria.field_name = "ec2VirtualMachineSummary/accountID"
+        computer_criteria.string_test = "equal"
+        computer_criteria.string_value = account_id
+
+        start = time.monotonic()
+        computers = list(iter_computers(api, configuration, api_version, api_exception, expand, [computer_criteria],
+                                        page_size))
+        return account_id, computers, time.monotonic() - start
+
+    computers_by_account = {}
+    seconds_by_account = {}
+    unique_account_ids = list(dict.fromkeys(account_ids))
+    for account_id, computers, seconds in worker_pool.map_in_order(search_account, unique_account_ids, max_workers):
+        computers_by_account[account_id] = computers
+        seconds_by_account[account_id] = seconds
+
+    return computers_by_account, seconds_by_account
+
+
+def search_computers_not_updated(api, configuration, api_version, api_exception, mirror=None):
     """ Search for computers that have not had their policy updated.
     Demonstrates searching for a null value.
 
@@ -196,9 +808,13 @@ def search_computers_not_updated(api, configuration, api_version, api_exception)
     :param configuration: Configuration object to pass to the api client.
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
+    :param mirror: Optional ComputerMirror to read the computers from instead of Deep Security Manager.
     :return: A Computers object that contains matching computers
     """
 
+    if mirror is not None:
+        return api.Computers(computers=mirror.search_computers_not_updated(api, configuration))
+
     # Search criteria
     computer_criteria = api.SearchCriteria()
     computer_criteria.field_name = "lastSendPolicySuccess"
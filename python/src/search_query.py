@@ -0,0 +1,314 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import calendar
+import datetime
+import numbers
+import re
+
+import search_examples
+
+# Search criteria tests for the comparison operators
+_NUMERIC_TESTS = {
+    "==": "equal",
+    "!=": "not-equal",
+    "<": "less-than",
+    "<=": "less-than-or-equal",
+    ">": "greater-than",
+    ">=": "greater-than-or-equal",
+}
+_STRING_TESTS = {"==": "equal", "!=": "not-equal"}
+_BOOLEAN_TESTS = {"==": "equal", "!=": "not-equal"}
+
+
+class Field(object):
+    """ A property of the searched objects, named as in the Deep Security API, for example "policyID" or
+    "ec2VirtualMachineSummary/accountID". Use "ID" for the ID of the objects.
+
+    Comparing a field creates a Predicate: Field("policyID") == 1, Field("hostName").like("web%").
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __eq__(self, value):
+        return Predicate(self.name, "==", value)
+
+    def __ne__(self, value):
+        return Predicate(self.name, "!=", value)
+
+    def __lt__(self, value):
+        return Predicate(self.name, "<", value)
+
+    def __le__(self, value):
+        return Predicate(self.name, "<=", value)
+
+    def __gt__(self, value):
+        return Predicate(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Predicate(self.name, ">=", value)
+
+    __hash__ = None
+
+    def like(self, pattern):
+        """ Matches strings against a pattern in which % matches any characters.
+        """
+
+        return Predicate(self.name, "like", pattern)
+
+    def is_null(self):
+        return Predicate(self.name, "==", None)
+
+    def is_not_null(self):
+        return Predicate(self.name, "!=", None)
+
+    def between(self, first, last, first_inclusive=True, last_inclusive=True):
+        """ Matches dates in a range. The dates are datetime objects or milliseconds since the epoch.
+        """
+
+        return Predicate(self.name, "between", (first, last, first_inclusive, last_inclusive))
+
+    def contains(self, value):
+        """ Matches lists that contain a value, such as Field("intrusionPrevention/ruleIDs").contains(6104).
+
+        Deep Security Manager cannot search lists, so this predicate is always evaluated on the client.
+        """
+
+        return Predicate(self.name, "contains", value)
+
+
+class Predicate(object):
+    """ A condition on one field. Predicates that Deep Security Manager supports are compiled to a SearchCriteria
+    object, and the others are evaluated on the client.
+    """
+
+    def __init__(self, field_name, operator, value):
+        self.field_name = field_name
+        self.operator = operator
+        self.value = value
+
+    def to_criteria(self, api):
+        """ Compiles the predicate to search criteria.
+
+        :param api: The Deep Security API modules.
+        :return: A SearchCriteria object, or None if the predicate cannot be evaluated by Deep Security Manager.
+        """
+
+        operator, value = self.operator, self.value
+        criteria = api.SearchCriteria()
+
+        if self.field_name.upper() == "ID":
+            if operator not in _NUMERIC_TESTS or not _is_number(value):
+                return None
+            criteria.id_test = _NUMERIC_TESTS[operator]
+            criteria.id_value = value
+            return criteria
+
+        criteria.field_name = self.field_name
+
+        if value is None and operator in ("==", "!="):
+            criteria.null_test = operator == "=="
+        elif operator == "between":
+            first, last, first_inclusive, last_inclusive = value
+            criteria.first_date_value = _to_milliseconds(first)
+            criteria.last_date_value = _to_milliseconds(last)
+            criteria.first_date_inclusive = first_inclusive
+            criteria.last_date_inclusive = last_inclusive
+        elif isinstance(value, datetime.datetime) and operator in ("<", "<=", ">", ">="):
+            if operator in (">", ">="):
+                criteria.first_date_value = _to_milliseconds(value)
+                criteria.first_date_inclusive = operator == ">="
+            else:
+                criteria.last_date_value = _to_milliseconds(value)
+                criteria.last_date_inclusive = operator == "<="
+        elif isinstance(value, bool) and operator in _BOOLEAN_TESTS:
+            criteria.boolean_test = _BOOLEAN_TESTS[operator]
+            criteria.boolean_value = value
+        elif _is_number(value) and operator in _NUMERIC_TESTS:
+            criteria.numeric_test = _NUMERIC_TESTS[operator]
+            criteria.numeric_value = value
+        elif isinstance(value, str) and operator in _STRING_TESTS:
+            criteria.string_test = _STRING_TESTS[operator]
+            criteria.string_value = value
+            criteria.string_wildcards = False
+        elif isinstance(value, str) and operator == "like":
+            criteria.string_test = "equal"
+            criteria.string_value = value
+            criteria.string_wildcards = True
+        else:
+            return None
+
+        return criteria
+
+    def matches(self, model):
+        """ Evaluates the predicate on the client.
+
+        :param model: A model object, such as a Computer.
+        :return: True if the object matches the predicate.
+        """
+
+        actual = _resolve(model, self.field_name)
+        operator, value = self.operator, self.value
+
+        if operator == "contains":
+            return actual is not None and value in actual
+        if operator == "like":
+            return actual is not None and re.match(_like_to_regex(value), str(actual), re.IGNORECASE) is not None
+        if operator == "between":
+            first, last, first_inclusive, last_inclusive = value
+            if actual is None:
+                return False
+            first, last = _to_milliseconds(first), _to_milliseconds(last)
+            return ((actual >= first if first_inclusive else actual > first) and
+                    (actual <= last if last_inclusive else actual < last))
+        if isinstance(value, datetime.datetime):
+            value = _to_milliseconds(value)
+        if operator == "==":
+            return actual == value
+        if operator == "!=":
+            return actual != value
+        if actual is None:
+            return False
+        if operator == "<":
+            return actual < value
+        if operator == "<=":
+            return actual <= value
+        if operator == ">":
+            return actual > value
+        return actual >= value
+
+
+class ClientPredicate(object):
+    """ A condition that is evaluated on the client by calling a function with each object.
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def to_criteria(self, api):
+        return None
+
+    def matches(self, model):
+        return bool(self.function(model))
+
+
+class Query(object):
+    """ A search that is the AND of predicates.
+
+    The predicates that Deep Security Manager supports are sent in the search filter, so fewer objects are retrieved,
+    and only the remaining predicates are evaluated on the client while the pages are retrieved.
+    """
+
+    def __init__(self, *predicates):
+        self.predicates = list(predicates)
+
+    def where(self, predicate):
+        """ Adds a predicate to the query.
+
+        :param predicate: A Predicate, or a function that receives an object and returns True if it matches.
+        :return: The query, so that calls can be chained.
+        """
+
+        if not isinstance(predicate, (Predicate, ClientPredicate)):
+            predicate = ClientPredicate(predicate)
+        self.predicates.append(predicate)
+        return self
+
+    def compile(self, api):
+        """ Splits the query into search criteria and the predicates that are evaluated on the client.
+
+        :param api: The Deep Security API modules.
+        :return: A tuple of a list of SearchCriteria objects and a list of residual predicates.
+        """
+
+        search_criteria = []
+        residual = []
+        for predicate in self.predicates:
+            criteria = predicate.to_criteria(api)
+            if criteria is None:
+                residual.append(predicate)
+            else:
+                search_criteria.append(criteria)
+        return search_criteria, residual
+
+    def iter_computers(self, api, configuration, api_version, api_exception, expand=None,
+                       page_size=search_examples.DEFAULT_PAGE_SIZE):
+        """ Generates the computers that match the query.
+
+        :param api: The Deep Security API modules.
+        :param configuration: Configuration object to pass to the api client.
+        :param api_version: The version of the API to use.
+        :param api_exception: The Deep Security API exception module.
+        :param expand: An Expand object that defines the information to include in the computers. It must include the
+        information that the residual predicates use. Defaults to none.
+        :param page_size: The maximum number of computers to retrieve with each call.
+        :return: A generator of Computer objects, in order of ID.
+        """
+
+        search_criteria, residual = self.compile(api)
+        pages = search_examples.iter_computer_pages(api, configuration, api_version, api_exception, expand,
+                                                    search_criteria, page_size)
+        return _filter_pages(pages, residual)
+
+    def iter_results(self, api, search, page_size=search_examples.DEFAULT_PAGE_SIZE):
+        """ Generates the objects that match the query, for any search method.
+
+        :param api: The Deep Security API modules.
+        :param search: A function that receives a SearchFilter and returns the list of objects that were found.
+        :param page_size: The maximum number of objects to retrieve with each call.
+        :return: A generator of objects, in order of ID.
+        """
+
+        search_criteria, residual = self.compile(api)
+        return _filter_pages(search_examples.iter_id_pages(api, search, search_criteria, page_size), residual)
+
+
+def _filter_pages(pages, residual):
+    for page in pages:
+        for model in page:
+            if all(predicate.matches(model) for predicate in residual):
+                yield model
+
+
+def _resolve(model, field_name):
+    # Follow a path of API property names, such as "ec2VirtualMachineSummary/accountID", through model attributes
+    value = model
+    for name in field_name.split("/"):
+        if value is None:
+            return None
+        attribute_map = getattr(value, "attribute_map", {})
+        attribute = next((python_name for python_name, api_name in attribute_map.items()
+                          if api_name.lower() == name.lower()), None)
+        if attribute is None:
+            attribute = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name).lower()
+        value = getattr(value, attribute, None)
+    return value
+
+
+def _like_to_regex(pattern):
+    return "^" + ".*".join(re.escape(part) for part in pattern.split("%")) + "$"
+
+
+def _to_milliseconds(value):
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return calendar.timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+    return value
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
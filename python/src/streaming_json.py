@@ -0,0 +1,144 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import codecs
+import json
+
+import model_serialization
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+def iter_array_items(chunks, array_name):
+    """ Decodes the elements of an array in a JSON object one at a time, as the bytes of the object arrive.
+
+    Only the element that is being decoded is held in memory, so a response such as {"computers": [...]} can be
+    processed without holding the whole response or all of its elements.
+
+    :param chunks: An iterable of bytes objects that together form a JSON object.
+    :param array_name: The name of the property of the object that contains the array, such as "computers".
+    :return: A generator of the decoded elements of the array, as dictionaries, lists or values.
+    """
+
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        name = reader.decode_value()
+        reader.expect(":")
+        if name == array_name and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield reader.decode_value()
+                    if reader.peek() == "]":
+                        reader.expect("]")
+                        break
+                    reader.expect(",")
+        else:
+            # Other properties are small, such as a count, so they are decoded and discarded
+            reader.decode_value()
+
+        if reader.peek() == "}":
+            return
+        reader.expect(",")
+
+
+def iter_response_models(api_client, response, array_name, response_type, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Generates the model objects of a response that was requested with _preload_content=False.
+
+    :param api_client: The ApiClient object that made the request.
+    :param response: The urllib3 response that the API method returned.
+    :param array_name: The name of the property of the response that contains the array, such as "computers".
+    :param response_type: The name of the model class of the elements, such as "Computer".
+    :param chunk_size: The number of bytes to read from the connection at a time.
+    :return: A generator of model objects.
+    """
+
+    try:
+        for data in iter_array_items(response.stream(chunk_size), array_name):
+            yield model_serialization.from_data(api_client, data, response_type)
+    finally:
+        response.release_conn()
+
+
+class _ChunkReader(object):
+    # Holds the undecoded text of a stream of chunks and reads more chunks when a value is incomplete
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._finished = False
+
+    def peek(self):
+        self._skip_whitespace()
+        return self._buffer[self._position]
+
+    def expect(self, character):
+        found = self.peek()
+        if found != character:
+            raise ValueError("Expected '{}' but found '{}' in JSON response".format(character, found))
+        self._position += 1
+
+    def decode_value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+
+            # A number that is not followed by a delimiter might continue in the next chunk
+            if (end == len(self._buffer) or self._buffer[end] not in _DELIMITERS) and self._read():
+                continue
+
+            self._position = end
+            return value
+
+    def _skip_whitespace(self):
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return
+            if not self._read():
+                raise ValueError("Unexpected end of JSON response")
+
+    def _read(self):
+        # Discard the text that was already decoded, then append the next chunk
+        if self._finished:
+            return False
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._finished = True
+        return False
@@ -0,0 +1,154 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+import threading
+
+
+class SweepCheckpoint(object):
+    """ Persists the progress of a long sweep to a local file so that a restarted sweep resumes where it stopped.
+
+    A sweep is made of one or more named cursors, such as the ID of the last computer of the last committed page, or
+    the ID of the last tenant that was processed. Each commit appends one line of JSON with the new cursor and the
+    results of the page, and flushes it to disk, so the cost of a commit does not grow with the number of pages. Only
+    the cursors are kept in memory; the committed results are read back from the file when a resumed sweep asks for
+    them. A line that was only partly written when the process stopped is ignored when the file is loaded.
+    """
+
+    def __init__(self, path):
+        """ Opens a checkpoint file, loading the progress of a previous sweep if the file exists.
+
+        :param path: The path of the checkpoint file.
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._cursors = {}
+        self._values = {}
+
+        if os.path.exists(path):
+            self._load()
+
+    def cursor(self, name, default=None):
+        """ Obtains the cursor of the last committed page.
+
+        :param name: The name of the cursor, such as "computers".
+        :param default: The value to return when nothing was committed for the cursor.
+        :return: The cursor.
+        """
+
+        with self._lock:
+            return self._cursors.get(name, default)
+
+    def results(self, name):
+        """ Reads the results that were committed for a cursor, one record of the file at a time.
+
+        Only the results that were committed before this method is called are read, so a sweep can restore its saved
+        results while it or another shard commits new pages.
+
+        :param name: The name of the cursor.
+        :return: A generator of the committed results, in the order that they were committed.
+        """
+
+        with self._lock:
+            # Records are only appended while the lock is held, so this size always ends with a complete record
+            end = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+        return self._iter_results(name, end)
+
+    def get(self, key, default=None):
+        """ Obtains a value that was saved with set, such as the boundaries of the shards of a sweep.
+
+        :param key: The key of the value.
+        :param default: The value to return when the key was not set.
+        :return: The value.
+        """
+
+        with self._lock:
+            return self._values.get(key, default)
+
+    def set(self, key, value):
+        """ Saves a value that a restarted sweep needs, such as the boundaries of the shards of a sweep.
+
+        :param key: The key of the value.
+        :param value: A JSON-compatible value.
+        """
+
+        self._append({"set": key, "value": value})
+
+    def commit(self, name, cursor, results=()):
+        """ Saves the cursor of a page that was processed, and the results of the page.
+
+        :param name: The name of the cursor.
+        :param cursor: A JSON-compatible cursor, such as the ID of the last object of the page.
+        :param results: A list of JSON-compatible results of the page.
+        """
+
+        self._append({"commit": name, "cursor": cursor, "results": list(results)})
+
+    def finish(self):
+        """ Deletes the checkpoint file after the sweep is complete, so the next sweep starts from the beginning.
+        """
+
+        with self._lock:
+            self._cursors = {}
+            self._values = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a") as checkpoint_file:
+                checkpoint_file.write(line)
+                checkpoint_file.flush()
+                os.fsync(checkpoint_file.fileno())
+            self._apply(record)
+
+    def _load(self):
+        with open(self.path, "rb+") as checkpoint_file:
+            committed_size = 0
+            for line in checkpoint_file:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("Incomplete record")
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    # The sweep stopped while this line was being written, so remove it before appending new records
+                    checkpoint_file.truncate(committed_size)
+                    break
+                self._apply(record)
+                committed_size += len(line)
+
+    def _apply(self, record):
+        if "set" in record:
+            self._values[record["set"]] = record["value"]
+        else:
+            self._cursors[record["commit"]] = record["cursor"]
+
+    def _iter_results(self, name, end):
+        if not end:
+            return
+
+        with open(self.path, "rb") as checkpoint_file:
+            position = 0
+            while position < end:
+                line = checkpoint_file.readline()
+                position += len(line)
+                record = json.loads(line.decode("utf-8"))
+                if record.get("commit") == name:
+                    for result in record["results"]:
+                        yield result
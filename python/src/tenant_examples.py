@@ -13,6 +13,9 @@
 # limitations under the License.
 #
 
+import client_registry
+import sweep_checkpoint
+
 
 def create_tenant(api, configuration, api_version, api_exception, account_name):
     """ Creates a tenant on the primary Deep Security Manager.
@@ -48,7 +51,7 @@ def create_tenant(api, configuration, api_version, api_exception, account_name):
     tenant.description = "Test tenant."
 
     # Create the tenant on Deep Security Manager
-    tenants_api = api.TenantsApi(api.ApiClient(configuration))
+    tenants_api = client_registry.get_api(api, api.TenantsApi, configuration)
     return tenants_api.create_tenant(tenant, api_version, confirmation_required=False, asynchronous=True)
 
 
@@ -75,11 +78,11 @@ def get_ip_states_for_tenant(api, configuration, api_version, api_exception, ten
     key.time_zone = "Asia/Tokyo"
 
     # Check that the tenant is in the 'active' state
-    state = api.TenantsApi(api.ApiClient(configuration)).describe_tenant(tenant_id, api_version).tenant_state
+    tenants_api = client_registry.get_api(api, api.TenantsApi, configuration)
+    state = tenants_api.describe_tenant(tenant_id, api_version).tenant_state
     if state == 'active':
 
         # Generate the secret key for the tenant
-        tenants_api = api.TenantsApi(api.ApiClient(configuration))
         generated_key = tenants_api.generate_tenant_api_secret_key(tenant_id, key, api_version)
 
         # Add the secret key to the configuration
@@ -89,7 +92,7 @@ def get_ip_states_for_tenant(api, configuration, api_version, api_exception, ten
         expand = api.Expand(api.Expand.intrusion_prevention)
 
         # Get a list of tenant computers
-        computers_api = api.ComputersApi(api.ApiClient(configuration))
+        computers_api = client_registry.get_api(api, api.ComputersApi, configuration)
         computers_list = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
 
         # Find the Intrusion Prevention state for each computer
@@ -102,27 +105,46 @@ def get_ip_states_for_tenant(api, configuration, api_version, api_exception, ten
     return computer_ip_states
 
 
-def get_ip_rules_for_tenant_computers(api, configuration, api_version, api_exception):
+def get_ip_rules_for_tenant_computers(api, configuration, api_version, api_exception, checkpoint_file=None):
     """ Obtains the IDs of the Intrusion Prevention rules that are assigned to each tenant's computers.
 
     :param api: The Deep Security API modules.
     :param configuration: Configuration object to pass to the api client.
     :param api_version: The version of the API to use.
     :param api_exception: The Deep Security API exception module.
+    :param checkpoint_file: Optional path of a file that saves the rules of each tenant after it is processed. If the
+    loop stops, calling this function again with the same file skips the tenants that were saved. The file is deleted
+    when all tenants are processed.
     :return: A dictionary of tenants IDs that contains a dictionary of computer IDs with the IP rules they are using.
     """
 
     tenant_rules = {}
     primary_key = configuration.api_key['api-secret-key']
 
-    tenants_api = api.TenantsApi(api.ApiClient(configuration))
+    # Restore the tenants that were processed before the loop stopped
+    checkpoint = None
+    processed_tenant_ids = set()
+    if checkpoint_file is not None:
+        checkpoint = sweep_checkpoint.SweepCheckpoint(checkpoint_file)
+        for tenant_id, computer_ip_rules in checkpoint.results("tenants"):
+            processed_tenant_ids.add(tenant_id)
+
+            # Tenants that were not active are saved without rules
+            if computer_ip_rules is not None:
+                tenant_rules[tenant_id] = {int(computer_id): rule_ids
+                                           for computer_id, rule_ids in computer_ip_rules.items()}
+
+    tenants_api = client_registry.get_api(api, api.TenantsApi, configuration)
     tenants_list = tenants_api.list_tenants(api_version)
 
     for tenant in tenants_list.tenants:
+        if tenant.id in processed_tenant_ids:
+            continue
+
         print("Processing tenant " + str(tenant.id))
 
         #  Check that the tenant is in the 'active' state
-        state = api.TenantsApi(api.ApiClient(configuration)).describe_tenant(tenant.id, api_version).tenant_state
+        state = tenants_api.describe_tenant(tenant.id, api_version).tenant_state
         if state == 'active':
 
             # Create an API key
@@ -133,7 +155,6 @@ def get_ip_rules_for_tenant_computers(api, configuration, api_version, api_excep
             key.time_zone = "Asia/Tokyo"
 
             # Generate the secret key for the tenant
-            tenants_api = api.TenantsApi(api.ApiClient(configuration))
             generated_key = tenants_api.generate_tenant_api_secret_key(tenant.id, key, api_version)
 
             # Add the secret key to the configuration
@@ -143,7 +164,7 @@ def get_ip_rules_for_tenant_computers(api, configuration, api_version, api_excep
             expand = api.Expand(api.Expand.intrusion_prevention)
 
             # Create a ComputersApi object for the tenant
-            computers_api = api.ComputersApi(api.ApiClient(configuration))
+            computers_api = client_registry.get_api(api, api.ComputersApi, configuration)
 
             # Get a list of computers for the tenant
             computers_list = computers_api.list_computers(api_version, expand=expand.list(), overrides=False)
@@ -158,6 +179,12 @@ def get_ip_rules_for_tenant_computers(api, configuration, api_version, api_excep
             # Reset the API key to the primary key
             configuration.api_key['api-secret-key'] = primary_key
 
+        if checkpoint is not None:
+            checkpoint.commit("tenants", tenant.id, [[tenant.id, tenant_rules.get(tenant.id)]])
+
+    if checkpoint is not None:
+        checkpoint.finish()
+
     return tenant_rules
 
 
@@ -184,18 +211,18 @@ def add_policy_to_tenant(api, configuration, api_version, api_exception, policy,
     key.timeZone = "Asia/Tokyo"
 
     # Check that the tenant is in the 'active' state
-    state = api.TenantsApi(api.ApiClient(configuration)).describe_tenant(tenant_id, api_version).tenant_state
+    tenants_api = client_registry.get_api(api, api.TenantsApi, configuration)
+    state = tenants_api.describe_tenant(tenant_id, api_version).tenant_state
     if state == 'active':
 
         # Generate the secret key for the tenant
-        tenants_api = api.TenantsApi(api.ApiClient(configuration))
         generated_key = tenants_api.generate_tenant_api_secret_key(tenant_id, key, api_version)
 
         # Add the secret key to the configuration
         configuration.api_key['api-secret-key'] = generated_key.secret_key
 
         # Add the policy
-        tenant_policies_api = api.PoliciesApi(api.ApiClient(configuration))
+        tenant_policies_api = client_registry.get_api(api, api.PoliciesApi, configuration)
         tenant_client_with_policy = tenant_policies_api.create_policy(policy, api_version, overrides=False)
 
         # Reset the API key to the primary key
@@ -0,0 +1,201 @@
+# Copyright 2019 Trend Micro.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import collections
+import concurrent.futures
+import contextvars
+import threading
+import time
+
+
+def map_in_order(function, items, max_workers):
+    """Calls a function for each item on a bounded pool of worker threads and yields the results in the order of the items.
+
+    At most max_workers calls are in flight at any time, and items are read from the iterable only as workers become
+    free, so a lazily generated list of items is never fully materialized. Each call runs in a copy of the context of
+    the caller, so context variables such as the retry budget of a job apply to the calls.
+
+    :param function: The function to call. It receives one item and its return value is yielded.
+    :param items: An iterable of items to pass to the function.
+    :param max_workers: The maximum number of concurrent calls. A value of 1 calls the function on the current thread.
+    :return: A generator of the results of the function, in the same order as items.
+    """
+
+    if max_workers is None or max_workers <= 1:
+        for item in items:
+            yield function(item)
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque()
+        for item in items:
+            pending.append(executor.submit(contextvars.copy_context().run, function, item))
+
+            # Wait for the oldest call before submitting more work than there are workers
+            if len(pending) >= max_workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+class AimdController(object):
+    """ Adjusts the number of concurrent calls with additive increase and multiplicative decrease (AIMD).
+
+    The limit grows by a step after each round of successful calls, where a round is as many calls as the current limit,
+    and is cut by a factor when the server reports an overload or the latency of a call spikes. Only one decrease is
+    applied for the calls that were in flight together, so a burst of errors from one round halves the limit once.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=64, increase=1, decrease_factor=0.5, latency_spike_factor=3.0,
+                 smoothing=0.2):
+        """ Creates a controller.
+
+        :param initial: The initial number of concurrent calls.
+        :param minimum: The smallest number of concurrent calls.
+        :param maximum: The largest number of concurrent calls.
+        :param increase: The number of calls that is added after each round of successful calls.
+        :param decrease_factor: The factor that the limit is multiplied by when calls are overloading the server.
+        :param latency_spike_factor: A call that takes this many times longer than the average latency is treated as a
+        sign of overload.
+        :param smoothing: The weight of each new latency in the exponential moving average of the latency.
+        """
+
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.smoothing = smoothing
+        self.limit = max(minimum, min(maximum, initial))
+        self.epoch = 0
+        self.average_latency = None
+        self._successes = 0
+        self._samples = 0
+        self._overloads_in_a_row = 0
+        self._pause = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, epoch, latency):
+        """ Records a call that succeeded.
+
+        :param epoch: The value of the epoch attribute when the call started.
+        :param latency: The number of seconds that the call took.
+        """
+
+        with self._lock:
+            self._overloads_in_a_row = 0
+            self._samples += 1
+            spike = (self._samples > 5 and self.average_latency is not None and
+                     latency > self.average_latency * self.latency_spike_factor)
+
+            # Spikes are part of the average too, so that a lasting change in latency becomes the new normal
+            if self.average_latency is None:
+                self.average_latency = latency
+            else:
+                self.average_latency += self.smoothing * (latency - self.average_latency)
+
+            if spike:
+                self._decrease(epoch)
+
+            # The call still succeeded, so it counts toward the next increase
+            self._successes += 1
+            if self._successes >= self.limit:
+                self._successes = 0
+                self.limit = min(self.maximum, self.limit + self.increase)
+
+    def record_overload(self, epoch):
+        """ Records a call that failed because the server is overloaded, for example with status 429.
+
+        :param epoch: The value of the epoch attribute when the call started.
+        """
+
+        with self._lock:
+            if self._decrease(epoch) or self.limit == self.minimum:
+                # Back off exponentially while overloads continue
+                self._overloads_in_a_row += 1
+                self._pause = max(self._pause, (2 ** (self._overloads_in_a_row + 3)) / 1000)
+
+    def pause(self):
+        """ Obtains and clears the number of seconds to wait before starting more calls after an overload.
+
+        :return: The number of seconds.
+        """
+
+        with self._lock:
+            pause, self._pause = self._pause, 0.0
+            return pause
+
+    def _decrease(self, epoch):
+        # Calls that started before the last decrease do not decrease the limit again
+        if epoch != self.epoch:
+            return False
+        self.epoch += 1
+        self._successes = 0
+        self.limit = max(self.minimum, int(self.limit * self.decrease_factor))
+        return True
+
+
+def map_adaptive(function, items, controller, is_overload, max_attempts=12):
+    """ Calls a function for each item with a number of concurrent calls that an AimdController adjusts.
+
+    Items whose call fails because of an overload are queued again, until they have been attempted max_attempts times.
+    Each call runs in a copy of the context of the caller.
+
+    :param function: The function to call. It receives one item.
+    :param items: An iterable of hashable items to pass to the function.
+    :param controller: An AimdController object.
+    :param is_overload: A function that receives an exception and returns True if it means that the server is
+    overloaded.
+    :param max_attempts: The maximum number of times to call the function for each item.
+    :return: A dictionary of the return value of the function for each item, or of the exception that it raised.
+    """
+
+    def call(item):
+        start = time.monotonic()
+        try:
+            return function(item), None, time.monotonic() - start
+        except Exception as e:
+            return None, e, time.monotonic() - start
+
+    results = {}
+    queued = collections.deque((item, 1) for item in items)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=controller.maximum) as executor:
+        in_flight = {}
+        while queued or in_flight:
+            # Start calls until the current limit is reached
+            while queued and len(in_flight) < controller.limit:
+                item, attempt = queued.popleft()
+                future = executor.submit(contextvars.copy_context().run, call, item)
+                in_flight[future] = (item, attempt, controller.epoch)
+
+            done, not_done = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                item, attempt, epoch = in_flight.pop(future)
+                result, error, latency = future.result()
+                if error is None:
+                    controller.record_success(epoch, latency)
+                    results[item] = result
+                elif is_overload(error) and attempt < max_attempts:
+                    controller.record_overload(epoch)
+                    queued.append((item, attempt + 1))
+                else:
+                    results[item] = error
+
+            pause = controller.pause()
+            if pause:
+                time.sleep(pause)
+
+    return results